@@ -0,0 +1,121 @@
+import json
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+class ChangeLog:
+    """
+    Records which devices, environments and membership edges changed, and when.
+
+    Every mutation bumps a global version counter and stamps the changed key with
+    it. Keys are kept in the order they last changed, so everything changed after
+    a given version is found by walking back from the newest entry, at a cost
+    proportional to the number of changes rather than the size of the home.
+    Deleted keys stay in the log as tombstones so any earlier version can sync.
+
+    Keys are tuples:
+    - ("device", device_id)
+    - ("environment", environment_name)
+    - ("edge", environment_name, device_id)
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._entries: "OrderedDict[Tuple, int]" = OrderedDict()
+
+    def record(self, key: Tuple) -> int:
+        """Mark a key as changed and return the new version."""
+        self.version += 1
+        self._entries[key] = self.version
+        self._entries.move_to_end(key)
+        return self.version
+
+    def version_of(self, key: Tuple) -> int:
+        """Get the version at which a key last changed, or 0 if it never did."""
+        return self._entries.get(key, 0)
+
+    def changes_since(self, since: int) -> Iterator[Tuple[Tuple, int]]:
+        """Yield (key, version) pairs changed after `since`, oldest first."""
+        changed = []
+        for key, version in reversed(self._entries.items()):
+            if version <= since:
+                break
+            changed.append((key, version))
+        return reversed(changed)
+
+
+def apply_changes(home, lines: Iterable[str]) -> Optional[int]:
+    """
+    Apply an NDJSON change export (see SmartHome.export_changes) to a replica SmartHome.
+
+    Returns:
+        Optional[int]: The version the replica is now in sync with, or None if the
+        export had no header line.
+    """
+    version = None
+    for line in lines:
+        record = json.loads(line)
+        op = record.get("op")
+
+        if op is None:
+            version = record["version"]
+
+        elif op == "upsert":
+            data = record["device"]
+            device = home.get_device(data["id"])
+            if device is not None and type(device).__name__.lower() != data["type"]:
+                # The ID was deleted and re-created as another type; only the latest state is exported.
+                home.remove_device(data["id"])
+                device = None
+            if device is None:
+                device = home.create_device(data["type"], data["id"])
+                home.register_device(device)
+            if data["status"] == "on":
+                device.turn_on()
+            else:
+                device.turn_off()
+            for field in device.state_fields:
+                if field in data:
+                    setattr(device, field, data[field])
+            device.location = data["location"]
+
+        elif op == "delete":
+            if home.get_device(record["device_id"]) is not None:
+                home.remove_device(record["device_id"])
+
+        elif op == "upsert_environment":
+            names = [record["environment"], *record.get("neighbors", [])]
+            if record.get("parent") is not None:
+                names.append(record["parent"])
+            # Parents and neighbors may be exported after this record; create them early.
+            for name in names:
+                if name not in home.environments:
+                    home.add_or_update_environment(name)
+            env = home.environments[record["environment"]]
+            env.kind = record.get("kind", env.kind)
+            parent = record.get("parent")
+            env.set_parent(home.environments[parent] if parent is not None else None)
+            neighbors = {home.environments[name] for name in record.get("neighbors", [])}
+            for neighbor in env.neighbors - neighbors:
+                env.disconnect(neighbor)
+            for neighbor in neighbors - env.neighbors:
+                env.connect(neighbor)
+
+        elif op == "delete_environment":
+            if record["environment"] in home.environments:
+                home.remove_environment(record["environment"])
+
+        elif op in ("link", "unlink"):
+            env = home.environments.get(record["environment"])
+            device = home.get_device(record["device_id"])
+            if env is None or device is None:
+                continue
+            location = device.location
+            if op == "link":
+                env.add_device(device)
+            else:
+                env.remove_device(device)
+            # Locations arrive with the device record; membership changes must not clobber them.
+            device.location = location
+
+    return version
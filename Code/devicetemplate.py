@@ -0,0 +1,85 @@
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Tuple
+from weakref import WeakValueDictionary
+
+
+class DeviceTemplate:
+    """
+    An immutable set of default attribute values shared by many devices.
+
+    Templates are interned per device class, so every device built with the same
+    configuration points at the same template object no matter which home it
+    belongs to. Devices only store their own copy of a field once it is written
+    with a value that differs from the template.
+    """
+
+    __slots__ = ("device_class", "values", "__weakref__")
+
+    _interned: "WeakValueDictionary[Tuple, DeviceTemplate]" = WeakValueDictionary()
+    # Devices are created on many threads (one per SmartHomeExecutor); keep lookup and insert together.
+    _intern_lock = threading.Lock()
+
+    def __init__(self, device_class: type, values: Dict[str, Any]) -> None:
+        object.__setattr__(self, "device_class", device_class)
+        object.__setattr__(self, "values", MappingProxyType(dict(values)))
+
+    @classmethod
+    def intern(cls, device_class: type, **values) -> "DeviceTemplate":
+        """
+        Return the shared template for a device class and set of default values.
+
+        Values only match when their types match too, so 1, 1.0 and True get separate
+        templates. Configurations with unhashable values get a template of their own.
+        """
+        key = (device_class, *((name, type(value), value) for name, value in sorted(values.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return cls(device_class, values)
+        with cls._intern_lock:
+            template = cls._interned.get(key)
+            if template is None:
+                template = cls(device_class, values)
+                cls._interned[key] = template
+        return template
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("DeviceTemplate is immutable.")
+
+    def __repr__(self) -> str:
+        values_str = ", ".join(f"{key}={value!r}" for key, value in self.values.items())
+        return f"DeviceTemplate({self.device_class.__name__}, {values_str})"
+
+
+class TemplateField:
+    """
+    A device attribute that reads from the device's template until it is overridden.
+
+    Writing a value equal to the template default drops the override again, so
+    devices only pay for the fields that actually differ.
+    """
+
+    def __set_name__(self, owner, name) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            return instance._template.values[self.name]
+
+    def __set__(self, instance, value) -> None:
+        overrides = instance.__dict__
+        default = instance._template.values[self.name]
+        was_overridden = self.name in overrides
+        if type(value) is type(default) and value == default:
+            overrides.pop(self.name, None)
+            is_overridden = False
+        else:
+            overrides[self.name] = value
+            is_overridden = True
+        if instance._template_index is not None and was_overridden != is_overridden:
+            instance._template_index.field_overridden(instance, self.name, is_overridden)
@@ -1,25 +1,50 @@
-from typing import List
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set
 from smartdevice import SmartDevice
 
 class Environment:
-    def __init__(self, name)-> None:
+    # Set by the owning SmartHome so membership changes show up in its change log.
+    _changelog = None
+
+    def __init__(self, name, kind: str = "room")-> None:
         self.name = name  
+        self.kind = kind
+        self.parent: Optional[Environment] = None
+        self.children: List[Environment] = []
+        self.neighbors: Set[Environment] = set()
         self._devices: List[SmartDevice] = []
+        self._members: Set[SmartDevice] = set()
+        # Insertion-ordered set of every environment below this one.
+        self._descendants: Dict[Environment, None] = {}
+        self._neighborhoods: Dict[int, FrozenSet[Environment]] = {}
+        self._own_counts: Dict[str, int] = {}
+        self._subtree_counts: Dict[str, int] = {}
+
+    def has_device(self, device) -> bool:
+        """Check whether a device is in the environment."""
+        return device in self._members
 
     def add_device(self, device) -> None:
         """Add a device to the environment."""
-        if device not in self._devices:
+        if device not in self._members:
             self._devices.append(device)
+            self._members.add(device)
+            self._count(device.__class__.__name__, 1)
             device.location = self.name  
+            if self._changelog is not None:
+                self._changelog.record(("edge", self.name, device._device_id))
             print(f"{device.__class__.__name__} added to {self.name}.")
         else:
             print(f"{device.__class__.__name__} is already in {self.name}.")
 
     def remove_device(self, device) -> None:
         """Remove a device from the environment."""
-        if device in self._devices:
+        if device in self._members:
             self._devices.remove(device)
+            self._members.discard(device)
+            self._count(device.__class__.__name__, -1)
             device.location = "unknown" 
+            if self._changelog is not None:
+                self._changelog.record(("edge", self.name, device._device_id))
             print(f"{device.__class__.__name__} removed from {self.name}.")
         else:
             print(f"{device.__class__.__name__} was not found in {self.name}.")
@@ -36,4 +61,132 @@ class Environment:
             device_ids.append(device._device_id)
         return device_ids
 
+    def ancestors(self) -> Iterator["Environment"]:
+        """Yield the parent, grandparent and so on up to the root."""
+        env = self.parent
+        while env is not None:
+            yield env
+            env = env.parent
+
+    def descendants(self) -> Set["Environment"]:
+        """Get every environment below this one in the hierarchy."""
+        return set(self._descendants)
+
+    def set_parent(self, parent: Optional["Environment"]) -> bool:
+        """
+        Move the environment (with its whole subtree) under a new parent, or make it a root.
+
+        Descendant sets and device counts of the old and new ancestors are updated
+        so that subtree queries never have to walk the hierarchy.
+
+        Returns:
+            bool: False if the move would create a cycle, True otherwise.
+        """
+        if parent is self.parent:
+            return True
+        if parent is self or parent in self._descendants:
+            print(f"Cannot place {self.name} inside its own subtree.")
+            return False
+
+        subtree = {self: None, **self._descendants}
+        if self.parent is not None:
+            self.parent.children.remove(self)
+            for ancestor in [self.parent, *self.parent.ancestors()]:
+                for env in subtree:
+                    del ancestor._descendants[env]
+                self._merge_counts(ancestor._subtree_counts, self._subtree_counts, -1)
+            if self.parent._changelog is not None:
+                self.parent._changelog.record(("environment", self.parent.name))
+
+        self.parent = parent
+        if parent is not None:
+            parent.children.append(self)
+            for ancestor in [parent, *parent.ancestors()]:
+                ancestor._descendants.update(subtree)
+                self._merge_counts(ancestor._subtree_counts, self._subtree_counts, 1)
+            if parent._changelog is not None:
+                parent._changelog.record(("environment", parent.name))
+
+        if self._changelog is not None:
+            self._changelog.record(("environment", self.name))
+        return True
+
+    def connect(self, other: "Environment") -> None:
+        """Mark two environments as adjacent, e.g. rooms that share a door."""
+        if other is self or other in self.neighbors:
+            return
+        self.neighbors.add(other)
+        other.neighbors.add(self)
+        self._invalidate_neighborhoods()
+        for env in (self, other):
+            if env._changelog is not None:
+                env._changelog.record(("environment", env.name))
+
+    def disconnect(self, other: "Environment") -> None:
+        """Remove the adjacency between two environments."""
+        if other not in self.neighbors:
+            return
+        self._invalidate_neighborhoods()
+        self.neighbors.discard(other)
+        other.neighbors.discard(self)
+        for env in (self, other):
+            if env._changelog is not None:
+                env._changelog.record(("environment", env.name))
+
+    def neighborhood(self, hops: int = 1) -> FrozenSet["Environment"]:
+        """
+        Get every environment within `hops` adjacency edges, including this one.
+
+        Results are cached per hop count and reused until an adjacency change in
+        this environment's connected component.
+        """
+        cached = self._neighborhoods.get(hops)
+        if cached is not None:
+            return cached
+        seen = {self}
+        frontier = [self]
+        for _ in range(hops):
+            next_frontier = []
+            for env in frontier:
+                for neighbor in env.neighbors:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        result = frozenset(seen)
+        self._neighborhoods[hops] = result
+        return result
+
+    def device_counts(self, include_descendants: bool = False) -> Dict[str, int]:
+        """Get the number of devices per type, optionally rolled up over the whole subtree."""
+        counts = self._subtree_counts if include_descendants else self._own_counts
+        return {device_type: count for device_type, count in counts.items() if count}
+
+    def subtree_devices(self) -> List[SmartDevice]:
+        """Get the devices in this environment and all of its descendants, each listed once."""
+        devices = dict.fromkeys(self._devices)
+        for env in self._descendants:
+            devices.update(dict.fromkeys(env._devices))
+        return list(devices)
+
+    def _invalidate_neighborhoods(self) -> None:
+        # Only environments connected to this one can have it, or anything reachable through it, cached.
+        seen = {self}
+        stack = [self]
+        while stack:
+            env = stack.pop()
+            env._neighborhoods.clear()
+            for neighbor in env.neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+
+    def _count(self, device_type: str, delta: int) -> None:
+        self._own_counts[device_type] = self._own_counts.get(device_type, 0) + delta
+        for env in [self, *self.ancestors()]:
+            env._subtree_counts[device_type] = env._subtree_counts.get(device_type, 0) + delta
 
+    @staticmethod
+    def _merge_counts(target: Dict[str, int], counts: Dict[str, int], sign: int) -> None:
+        for device_type, count in counts.items():
+            target[device_type] = target.get(device_type, 0) + sign * count
@@ -0,0 +1,169 @@
+import heapq
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from smartdevice import SmartDevice
+
+
+class HeartbeatTracker:
+    """
+    Tracks when each device was last seen and which devices have gone offline.
+
+    Last-seen timestamps live in a compact array indexed by a per-device slot.
+    Every online device sits in a timeout bucket keyed by its deadline, so
+    `expire()` only touches buckets whose deadline has passed instead of
+    scanning the whole fleet. Online/offline counts are kept per location and
+    updated incrementally whenever a device changes state or moves.
+    """
+
+    def __init__(self, timeout: float = 30.0, bucket_width: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.timeout = timeout
+        self.bucket_width = bucket_width
+        self._clock = clock
+        self._last_seen = array('d')
+        self._online = bytearray()
+        self._bucket_of = array('q')
+        self._devices: List[Optional[SmartDevice]] = []
+        self._locations: List[str] = []
+        self._free_slots: List[int] = []
+        self._buckets: Dict[int, Set[int]] = {}
+        self._deadlines: List[int] = []
+        self._health: Dict[str, List[int]] = {}
+        self.online_count = 0
+        self.offline_count = 0
+
+    def register(self, device: SmartDevice) -> None:
+        """Start tracking a device. A newly registered device counts as seen now."""
+        if device._tracker is not None:
+            return
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._devices[slot] = device
+            self._locations[slot] = device.location
+            self._online[slot] = 0
+        else:
+            slot = len(self._devices)
+            self._devices.append(device)
+            self._locations.append(device.location)
+            self._last_seen.append(0.0)
+            self._online.append(0)
+            self._bucket_of.append(-1)
+        device._tracker = self
+        device._slot = slot
+        self._counts(device.location)[1] += 1
+        self.offline_count += 1
+        self.beat(device)
+
+    def unregister(self, device: SmartDevice) -> None:
+        """Stop tracking a device and release its slot."""
+        if device._tracker is not self:
+            return
+        slot = device._slot
+        self._unbucket(slot)
+        counts = self._counts(self._locations[slot])
+        if self._online[slot]:
+            counts[0] -= 1
+            self.online_count -= 1
+        else:
+            counts[1] -= 1
+            self.offline_count -= 1
+        self._online[slot] = 0
+        self._devices[slot] = None
+        self._free_slots.append(slot)
+        device._tracker = None
+        device._slot = -1
+
+    def beat(self, device: SmartDevice) -> None:
+        """Record a heartbeat from a device and push its deadline forward."""
+        slot = device._slot
+        now = self._clock()
+        self._last_seen[slot] = now
+        self._unbucket(slot)
+        key = int((now + self.timeout) // self.bucket_width)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = set()
+            heapq.heappush(self._deadlines, key)
+        bucket.add(slot)
+        self._bucket_of[slot] = key
+        if not self._online[slot]:
+            self._online[slot] = 1
+            counts = self._counts(self._locations[slot])
+            counts[0] += 1
+            counts[1] -= 1
+            self.online_count += 1
+            self.offline_count -= 1
+
+    def expire(self) -> List[SmartDevice]:
+        """
+        Mark devices whose deadline has passed as offline.
+
+        Only buckets that lie entirely in the past are visited, so the cost is
+        proportional to the number of expired devices. Expiry therefore has a
+        resolution of `bucket_width` seconds.
+
+        Returns:
+            List[SmartDevice]: The devices that went offline during this call.
+        """
+        current = int(self._clock() // self.bucket_width)
+        expired = []
+        while self._deadlines and self._deadlines[0] < current:
+            key = heapq.heappop(self._deadlines)
+            for slot in self._buckets.pop(key, ()):
+                self._bucket_of[slot] = -1
+                self._online[slot] = 0
+                counts = self._counts(self._locations[slot])
+                counts[0] -= 1
+                counts[1] += 1
+                expired.append(self._devices[slot])
+        self.online_count -= len(expired)
+        self.offline_count += len(expired)
+        return expired
+
+    def relocate(self, device: SmartDevice, old_location: str, new_location: str) -> None:
+        """Move a device's contribution to the health summaries to a new location."""
+        slot = device._slot
+        index = 0 if self._online[slot] else 1
+        self._counts(old_location)[index] -= 1
+        self._counts(new_location)[index] += 1
+        self._locations[slot] = new_location
+
+    def is_online(self, device: SmartDevice) -> bool:
+        """Check whether a tracked device has sent a heartbeat within the timeout, as of now."""
+        if device._tracker is not self:
+            return False
+        slot = device._slot
+        return bool(self._online[slot]) and self._clock() - self._last_seen[slot] <= self.timeout
+
+    def last_seen(self, device: SmartDevice) -> Optional[float]:
+        """Get the clock value of the device's last heartbeat, if it is tracked."""
+        if device._tracker is not self:
+            return None
+        return self._last_seen[device._slot]
+
+    def health(self, location: str) -> Tuple[int, int]:
+        """
+        Return the (online, offline) device counts for a location.
+
+        Counts, like `online_count` and `offline_count`, are only updated by
+        `expire()`; call it first to include devices that have since timed out.
+        """
+        counts = self._health.get(location)
+        if counts is None:
+            return 0, 0
+        return counts[0], counts[1]
+
+    def _counts(self, location: str) -> List[int]:
+        counts = self._health.get(location)
+        if counts is None:
+            counts = self._health[location] = [0, 0]
+        return counts
+
+    def _unbucket(self, slot: int) -> None:
+        key = self._bucket_of[slot]
+        if key != -1:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(slot)
+            self._bucket_of[slot] = -1
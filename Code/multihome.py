@@ -0,0 +1,166 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from devicetemplate import DeviceTemplate, TemplateField
+from smartdevice import SmartDevice
+from smarthome import SmartHome
+
+
+class MultiHomeManager:
+    """
+    A class to hold many SmartHome instances, one per tenant, in a single process.
+
+    Devices across all homes share interned DeviceTemplate objects for their
+    default configuration. The manager indexes devices by template and keeps a
+    separate index of devices that override a template field, so cross-tenant
+    queries only look at the templates and overrides that can match. Each home
+    reports its own device additions and removals back to the manager, so the
+    indexes stay correct when a home returned by `get_home` is changed directly.
+    The indexes are shared by all homes and guarded by a lock, so each home may be
+    driven by its own SmartHomeExecutor.
+    """
+
+    def __init__(self, heartbeat_timeout: float = 30.0) -> None:
+        self.heartbeat_timeout = heartbeat_timeout
+        self.homes: Dict[str, SmartHome] = {}
+        self._by_template: Dict[DeviceTemplate, Dict[SmartDevice, str]] = {}
+        self._templates_by_class: Dict[type, Set[DeviceTemplate]] = {}
+        self._overrides: Dict[Tuple[type, str], Dict[SmartDevice, str]] = {}
+        self._lock = threading.Lock()
+
+    def add_home(self, tenant_id: str) -> Optional[SmartHome]:
+        """Create and return an empty smart home for a tenant."""
+        if tenant_id in self.homes:
+            print(f"Error: Home for tenant {tenant_id} already exists!")
+            return None
+        home = SmartHome(heartbeat_timeout=self.heartbeat_timeout)
+        home._template_index = self
+        home._tenant_id = tenant_id
+        self.homes[tenant_id] = home
+        return home
+
+    def get_home(self, tenant_id: str) -> Optional[SmartHome]:
+        """Retrieve a tenant's smart home, or None if the tenant is unknown."""
+        return self.homes.get(tenant_id)
+
+    def remove_home(self, tenant_id: str) -> None:
+        """Remove a tenant's smart home and drop its devices from the shared indexes."""
+        home = self.homes.pop(tenant_id, None)
+        if home is None:
+            print(f"No home for tenant {tenant_id} found.")
+            return
+        home._template_index = None
+        home._tenant_id = None
+        for device in home._devices:
+            self._unindex(device)
+
+    def add_device(self, tenant_id: str, device_type: str, device_id: str, **attributes) -> Optional[SmartDevice]:
+        """
+        Create a device in a tenant's home and index it for cross-tenant queries.
+
+        Parameters:
+        - tenant_id (str): The tenant whose home receives the device.
+        - device_type (str): The type of device to create.
+        - device_id (str): The unique identifier for the device within the home.
+        - attributes: Constructor arguments for the device class.
+
+        Returns:
+        - device (SmartDevice): The created device, or None if it could not be added.
+        """
+        home = self.homes.get(tenant_id)
+        if home is None:
+            print(f"No home for tenant {tenant_id} found.")
+            return None
+        device = home.create_device(device_type, device_id, **attributes)
+        if device is None or not home.register_device(device):
+            return None
+        return device
+
+    def remove_device(self, tenant_id: str, device_id: str) -> None:
+        """Remove a device from a tenant's home and from the shared indexes."""
+        home = self.homes.get(tenant_id)
+        if home is None:
+            print(f"No home for tenant {tenant_id} found.")
+            return
+        home.remove_device(device_id)
+
+    def find_devices(self, device_class: type, **criteria) -> List[Tuple[str, SmartDevice]]:
+        """
+        Find devices of a class across all tenants whose template fields match the criteria.
+
+        Example: find_devices(SmartThermostat, mode="heating")
+
+        Returns:
+            List[Tuple[str, SmartDevice]]: (tenant ID, device) pairs for every match.
+        """
+        for name in criteria:
+            if not isinstance(getattr(device_class, name, None), TemplateField):
+                print(f"{device_class.__name__} has no template field '{name}'.")
+                return []
+
+        matches: Dict[SmartDevice, str] = {}
+        with self._lock:
+            for template in self._templates_by_class.get(device_class, ()):
+                if all(template.values[name] == value for name, value in criteria.items()):
+                    for device, tenant_id in self._by_template[template].items():
+                        if not any(name in device.__dict__ for name in criteria):
+                            matches[device] = tenant_id
+
+            for name in criteria:
+                for device, tenant_id in self._overrides.get((device_class, name), {}).items():
+                    if all(getattr(device, key) == value for key, value in criteria.items()):
+                        matches[device] = tenant_id
+
+        return [(tenant_id, device) for device, tenant_id in matches.items()]
+
+    def device_added(self, tenant_id: str, device: SmartDevice) -> None:
+        """Index a device that was registered in a tenant's home."""
+        self._index(tenant_id, device)
+
+    def device_removed(self, device: SmartDevice) -> None:
+        """Drop a device that was removed from a tenant's home from the shared indexes."""
+        self._unindex(device)
+
+    def field_overridden(self, device: SmartDevice, name: str, overridden: bool) -> None:
+        """Keep the override index in sync when a device writes or resets a template field."""
+        with self._lock:
+            tenant_id = self._by_template[device._template][device]
+            key = (type(device), name)
+            if overridden:
+                self._overrides.setdefault(key, {})[device] = tenant_id
+            else:
+                devices = self._overrides.get(key)
+                if devices is not None:
+                    devices.pop(device, None)
+
+    def _index(self, tenant_id: str, device: SmartDevice) -> None:
+        template = device._template
+        if template is None:
+            return
+        with self._lock:
+            members = self._by_template.get(template)
+            if members is None:
+                members = self._by_template[template] = {}
+                self._templates_by_class.setdefault(template.device_class, set()).add(template)
+            members[device] = tenant_id
+            for name in template.values:
+                if name in device.__dict__:
+                    self._overrides.setdefault((type(device), name), {})[device] = tenant_id
+            device._template_index = self
+
+    def _unindex(self, device: SmartDevice) -> None:
+        template = device._template
+        if template is None:
+            return
+        with self._lock:
+            if device._template_index is not self:
+                return
+            members = self._by_template[template]
+            del members[device]
+            if not members:
+                del self._by_template[template]
+                self._templates_by_class[template.device_class].discard(template)
+            for name in template.values:
+                devices = self._overrides.get((type(device), name))
+                if devices is not None:
+                    devices.pop(device, None)
+            device._template_index = None
@@ -1,13 +1,20 @@
 from smartdevice import SmartDevice
+from devicetemplate import DeviceTemplate, TemplateField
 from typing import Dict
 
 class SmartCamera(SmartDevice):
+    state_fields = ('view_angle', 'original_capacity', 'remaining_capacity', 'is_recording', 'motion_detection')
+    view_angle = TemplateField()
+    original_capacity = TemplateField()
+    remaining_capacity = TemplateField()
+
     def __init__(self, device_id, view_angle=120, recording_capacity=120, motion_detection=False, **kwargs):
         super().__init__(device_id, **kwargs)
-        self.view_angle = view_angle
-        self.original_capacity = recording_capacity  
-        self.remaining_capacity = recording_capacity  
+        self._template = DeviceTemplate.intern(SmartCamera, view_angle=view_angle,
+                                               original_capacity=recording_capacity,
+                                               remaining_capacity=recording_capacity)
         self.is_recording = False  
+        self.motion_detection = motion_detection
 
     def start_recording(self)-> None:
         """Start recording."""
@@ -1,10 +1,26 @@
 from abc import ABC, abstractmethod
 
 class SmartDevice(ABC):
+    # Attributes that make up the device's state, in addition to ID, status and location.
+    state_fields: tuple = ()
+    # Set by the owning SmartHome so attribute writes show up in its change log.
+    _changelog = None
+    # Bookkeeping defaults live on the class so unattached devices don't store them.
+    _tracker = None
+    _slot = -1
+    _template = None
+    _template_index = None
+    _untracked_attributes = frozenset(('_tracker', '_slot', '_template_index', '_changelog', 'location'))
+
     def __init__(self, device_id, status="off", location="unknown"):
         self._device_id = device_id 
         self._status = status 
-        self.location = location
+        self._location = location
+
+    def __setattr__(self, name, value) -> None:
+        object.__setattr__(self, name, value)
+        if self._changelog is not None and name not in self._untracked_attributes:
+            self._changelog.record(("device", self._device_id))
 
     @property
     def status(self):
@@ -16,11 +32,53 @@ class SmartDevice(ABC):
         """Get the device ID."""
         return self._device_id
 
+    @property
+    def location(self) -> str:
+        """Get the name of the environment the device is in."""
+        return self._location
+
+    @location.setter
+    def location(self, new_location: str) -> None:
+        """Set the device's location, keeping the heartbeat tracker's summaries in sync."""
+        if self._tracker is not None and new_location != self._location:
+            self._tracker.relocate(self, self._location, new_location)
+        self._location = new_location
+
+    @property
+    def is_online(self) -> bool:
+        """Check whether the device has sent a heartbeat within its timeout."""
+        return self._tracker is not None and self._tracker.is_online(self)
+
+    def attributes(self) -> dict:
+        """Get the device's public attributes, including values inherited from its template."""
+        attributes = dict(self._template.values) if self._template is not None else {}
+        attributes.update((attr, value) for attr, value in vars(self).items() if not attr.startswith("_"))
+        attributes["location"] = self._location
+        return attributes
+
+    def to_dict(self) -> dict:
+        """Get the device's state as plain, JSON-serializable values."""
+        data = {
+            'id': self._device_id,
+            'type': type(self).__name__.lower(),
+            'status': self._status,
+            'location': self._location,
+            'online': self.is_online,
+        }
+        for field in self.state_fields:
+            data[field] = getattr(self, field)
+        return data
+
     @abstractmethod
     def get_details(self) -> dict:
         """Retrieve details of the device. Must be implemented by subclasses."""
         pass
 
+    def heartbeat(self) -> None:
+        """Report that the device is alive."""
+        if self._tracker is not None:
+            self._tracker.beat(self)
+
     def turn_on(self):
         """Turn the device on."""
         self._status = "on"
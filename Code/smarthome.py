@@ -1,19 +1,35 @@
-from typing import Dict, List, Optional, Union
+import json
+from typing import Dict, Iterator, List, Optional, Union
 from environment import Environment
 from smartcamera import SmartCamera
 from smartlight import SmartLight
 from smartthermostat import SmartThermostat
 from voiceassistant import VoiceAssistant
 from smartdevice import SmartDevice
+from heartbeat import HeartbeatTracker
+from changelog import ChangeLog
+
+DEVICE_TYPES = {
+    'smartcamera': SmartCamera,
+    'smartlight': SmartLight,
+    'smartthermostat': SmartThermostat,
+    'voiceassistant': VoiceAssistant,
+}
 
 class SmartHome:
     """
     A class to represent a smart home which can hold various smart devices and environments.
     """
 
-    def __init__(self):
+    def __init__(self, heartbeat_timeout: float = 30.0):
         self._devices: List[SmartDevice] = []
         self.environments: Dict[str, Environment] = {} 
+        self._device_index: Dict[str, SmartDevice] = {}
+        self.heartbeats = HeartbeatTracker(timeout=heartbeat_timeout)
+        self.changes = ChangeLog()
+        # Set by a MultiHomeManager so devices added or removed here stay in its shared indexes.
+        self._template_index = None
+        self._tenant_id = None
 
     def add_device(self, device_type: str, device_id: str) -> Optional[Union[SmartCamera, SmartLight, SmartThermostat, VoiceAssistant]]:
         """
@@ -26,71 +42,108 @@ class SmartHome:
         Returns:
         - device (Union[SmartCamera, SmartLight, SmartThermostat, VoiceAssistant]): The created device instance.
         """
-        if device_id in self._devices:
+        if device_id in self._device_index:
             print(f"Error: Device with ID {device_id} already exists!")
             return
-        
-        if any(device._device_id == device_id for device in self._devices):
-            print(f"Error: Device with ID {device_id} already exists!")
-            return
-        
-        device = None
 
         if device_type == 'smartcamera':
             view_angle = int(input("Enter view angle for SmartCamera: "))
-            device = SmartCamera(device_id=device_id, view_angle=view_angle)
+            attributes = {'view_angle': view_angle}
 
         elif device_type == 'smartlight':
             brightness = int(input("Enter intensity for SmartLight: "))
             color = input("Enter color (if RGB) for SmartLight: ")
-            device = SmartLight(device_id=device_id, brightness=brightness, color=color)
+            attributes = {'brightness': brightness, 'color': color}
 
         elif device_type == 'smartthermostat':
             desired_temperature = int(input("Enter desired temperature for SmartThermostat: "))
             mode = input("Enter mode (cooling/heating) for SmartThermostat: ")
-            device = SmartThermostat(device_id=device_id, desired_temp=desired_temperature, mode=mode)
+            attributes = {'desired_temp': desired_temperature, 'mode': mode}
 
         elif device_type == 'voiceassistant':
             volume = int(input("Enter volume for VoiceAssistant: "))
             language = input("Enter language for VoiceAssistant: ")
-            device = VoiceAssistant(device_id=device_id, volume=volume, language=language)
+            attributes = {'volume': volume, 'language': language}
 
         else:
             print(f"Unknown device type: {device_type}")
             return
 
-        self._devices.append(device)
+        device = self.create_device(device_type, device_id, **attributes)
+        if not self.register_device(device):
+            return
         print(f"{device_type} with ID {device_id} added.")
         return device
 
-    def remove_device(self, device_id: str) -> None:
+    def create_device(self, device_type: str, device_id: str, **attributes) -> Optional[SmartDevice]:
         """
-        Remove a device from the smart home based on device_id.
+        Create a device instance without prompting for its attributes.
 
         Parameters:
-        - device_id (str): The unique identifier for the device to be removed.
+        - device_type (str): The type of device to create (a key of DEVICE_TYPES).
+        - device_id (str): The unique identifier for the device.
+        - attributes: Constructor arguments for the device class.
+
+        Returns:
+        - device (SmartDevice): The created device, or None if the type is unknown.
         """
-        self.list_all_devices()
-        device = self._devices.get(device_id)
+        device_class = DEVICE_TYPES.get(device_type)
+        if device_class is None:
+            print(f"Unknown device type: {device_type}")
+            return None
+        return device_class(device_id=device_id, **attributes)
 
-        if not device:
-            print("Device with given ID not found!")
-            return
+    def register_device(self, device: SmartDevice) -> bool:
+        """
+        Add an already created device to the smart home.
+
+        Returns:
+        - bool: True if the device was added, False if its ID is already taken or it still belongs to a smart home.
+        """
+        if device._tracker is not None or device._changelog is not None:
+            print(f"Error: Device with ID {device._device_id} already belongs to a smart home!")
+            return False
+        if device._device_id in self._device_index:
+            print(f"Error: Device with ID {device._device_id} already exists!")
+            return False
+        self._devices.append(device)
+        self._device_index[device._device_id] = device
+        self.heartbeats.register(device)
+        device._changelog = self.changes
+        self.changes.record(("device", device._device_id))
+        if self._template_index is not None:
+            self._template_index.device_added(self._tenant_id, device)
+        return True
+
+    def get_device(self, device_id: str) -> Optional[SmartDevice]:
+        """Retrieve a device by its ID, or None if it is not in the smart home."""
+        return self._device_index.get(device_id)
 
-        self._devices.pop(device_id)
+    def remove_device(self, device_id: str) -> None:
+        """
+        Remove a device from the smart home based on device_id.
 
-        device = next((d for d in self._devices if d._device_id == device_id), None)
+        Parameters:
+        - device_id (str): The unique identifier for the device to be removed.
+        """
+        device = self.get_device(device_id)
 
         if not device:
             print("Device with given ID not found!")            
             return
 
         self._devices.remove(device)
+        del self._device_index[device_id]
+        self.heartbeats.unregister(device)
 
         for env in self.environments.values():
-            if device in env._devices:
+            if env.has_device(device):
                 env.remove_device(device)
 
+        device._changelog = None
+        self.changes.record(("device", device_id))
+        if self._template_index is not None:
+            self._template_index.device_removed(device)
         print(f"Device with ID {device_id} removed from smart home and all environments it was present in.")
 
     def modify_device(self, device_id: str) -> None:
@@ -103,7 +156,7 @@ class SmartHome:
         Returns:
             None: The function modifies the device attributes in place and does not return a value.
         """
-        device = next((d for d in self._devices if d._device_id == device_id), None)
+        device = self.get_device(device_id)
         if not device:
             print("Device not found!")
             return
@@ -145,13 +198,34 @@ class SmartHome:
 
         print("Device attributes updated!")
 
-    def add_or_update_environment(self, environment_name: str, environment: Environment = None) -> None:
-        """Adds or updates an environment instance to the smart home."""
-        
+    def add_or_update_environment(self, environment_name: str, environment: Environment = None,
+                                  kind: str = "room", parent: Optional[str] = None) -> None:
+        """
+        Adds or updates an environment instance to the smart home.
+
+        Parameters:
+        - environment_name (str): The name of the environment.
+        - environment (Environment): An existing instance to add or replace the current one with.
+        - kind (str): The level of a newly created environment ('building', 'floor', 'room', ...).
+        - parent (str): The name of the environment to place it under, if any.
+        """
+        if parent is not None and parent not in self.environments:
+            print(f"The environment '{parent}' doesn't exist.")
+            return
+
         if environment_name in self.environments:
             if environment:
-                # Update the existing environment with the new one
+                # Update the existing environment with the new one, keeping its place in the hierarchy
+                old = self.environments[environment_name]
+                old_parent, children, neighbors = old.parent, list(old.children), list(old.neighbors)
+                self._detach_environment(old)
                 self.environments[environment_name] = environment
+                self._attach_environment(environment)
+                environment.set_parent(self.environments[parent] if parent is not None else old_parent)
+                for child in children:
+                    child.set_parent(environment)
+                for neighbor in neighbors:
+                    environment.connect(neighbor)
                 print(f"Environment '{environment_name}' updated in the smart home.")
             else:
                 print(f"{environment_name} already exists in the smart home.")
@@ -161,31 +235,127 @@ class SmartHome:
             self.environments[environment_name] = environment
         else:
             # Create a new Environment instance if none is provided
-            self.environments[environment_name] = Environment(environment_name) 
+            self.environments[environment_name] = Environment(environment_name, kind) 
+        self._attach_environment(self.environments[environment_name])
+        if parent is not None:
+            self.environments[environment_name].set_parent(self.environments[parent])
 
         print(f"Environment '{environment_name}' added to the smart home.")
 
     def remove_environment(self, environment_name)-> None:
-        """Remove an environment from the smart home."""
+        """
+        Remove an environment from the smart home.
+
+        Its child environments move up to its parent, its adjacency edges are
+        dropped and devices located in it go back to 'unknown'.
+        """
         if environment_name in self.environments:
-            del self.environments[environment_name]
+            env = self.environments.pop(environment_name)
+            self._detach_environment(env)
+            for device in env._devices:
+                if device.location == environment_name:
+                    device.location = "unknown"
             print(f"Environment '{environment_name}' removed from the smart home.")
         else:
             print(f"{environment_name} doesn't exist in the smart home.")
 
+    def set_environment_parent(self, environment_name: str, parent_name: Optional[str]) -> None:
+        """Place an environment under another one, or make it a root if parent_name is None."""
+        for name in (environment_name, parent_name):
+            if name is not None and name not in self.environments:
+                print(f"The environment '{name}' doesn't exist.")
+                return
+        parent = self.environments[parent_name] if parent_name is not None else None
+        if self.environments[environment_name].set_parent(parent):
+            print(f"Environment '{environment_name}' is now under '{parent_name}'.")
+
+    def connect_environments(self, first_name: str, second_name: str) -> None:
+        """Mark two environments as adjacent."""
+        for name in (first_name, second_name):
+            if name not in self.environments:
+                print(f"The environment '{name}' doesn't exist.")
+                return
+        self.environments[first_name].connect(self.environments[second_name])
+        print(f"Environments '{first_name}' and '{second_name}' are now adjacent.")
+
+    def disconnect_environments(self, first_name: str, second_name: str) -> None:
+        """Remove the adjacency between two environments."""
+        for name in (first_name, second_name):
+            if name not in self.environments:
+                print(f"The environment '{name}' doesn't exist.")
+                return
+        self.environments[first_name].disconnect(self.environments[second_name])
+        print(f"Environments '{first_name}' and '{second_name}' are no longer adjacent.")
+
+    def select_devices(self, environment_name: str, scope: str = "environment", hops: int = 1,
+                       device_type: Optional[str] = None) -> List[SmartDevice]:
+        """
+        Collect the devices of an environment, its subtree or its neighborhood.
+
+        Parameters:
+        - environment_name (str): The environment to start from.
+        - scope (str): 'environment' for its own devices, 'subtree' to include every
+          descendant, or 'neighborhood' for every environment within `hops` adjacency
+          edges (with their subtrees).
+        - hops (int): The neighborhood radius.
+        - device_type (str): Only keep devices of this type (a key of DEVICE_TYPES).
+
+        Returns:
+        - List[SmartDevice]: The selected devices, each listed once.
+        """
+        env = self.environments.get(environment_name)
+        if env is None:
+            print(f"The environment '{environment_name}' doesn't exist.")
+            return []
+
+        if scope == "environment":
+            devices = list(env._devices)
+        elif scope == "subtree":
+            devices = env.subtree_devices()
+        elif scope == "neighborhood":
+            selected = {}
+            for neighbor in env.neighborhood(hops):
+                selected.update(dict.fromkeys(neighbor.subtree_devices()))
+            devices = list(selected)
+        else:
+            print(f"Unknown scope: {scope}")
+            return []
+
+        if device_type is not None:
+            device_class = DEVICE_TYPES.get(device_type)
+            devices = [device for device in devices if type(device) is device_class]
+        return devices
+
+    def _attach_environment(self, env: Environment) -> None:
+        env._changelog = self.changes
+        self.changes.record(("environment", env.name))
+        for device in env._devices:
+            self.changes.record(("edge", env.name, device._device_id))
+
+    def _detach_environment(self, env: Environment) -> None:
+        for child in list(env.children):
+            child.set_parent(env.parent)
+        env.set_parent(None)
+        for neighbor in list(env.neighbors):
+            env.disconnect(neighbor)
+        env._changelog = None
+        self.changes.record(("environment", env.name))
+        for device in env._devices:
+            self.changes.record(("edge", env.name, device._device_id))
+
     def add_device_to_environment(self, device_id: str, environment_name: str) -> None:
         """Add a device to a specific environment."""
         if environment_name not in self.environments:
             print(f"The environment '{environment_name}' doesn't exist.")
             return
         
-        device = next((d for d in self._devices if d._device_id == device_id), None)
+        device = self.get_device(device_id)
         if not device:
             print(f"No device with ID '{device_id}' found.")
             return
 
         env = self.environments[environment_name]
-        if device in env._devices:
+        if env.has_device(device):
             print(f"Device with ID '{device_id}' is already in the '{environment_name}' environment.")
             return
 
@@ -210,13 +380,13 @@ class SmartHome:
         env = self.environments[environment_name]
         
         # Find the device based on device_id
-        device = next((d for d in self._devices if d._device_id == device_id), None)
+        device = self.get_device(device_id)
         if not device:
             print(f"No device with ID '{device_id}' found.")
             return
 
         # Check if the device is in the specified environment
-        if device not in env._devices:
+        if not env.has_device(device):
             print(f"Device with ID '{device_id}' is not in the '{environment_name}' environment.")
             return
         
@@ -225,13 +395,18 @@ class SmartHome:
         device.location = "unknown"
         print(f"Device with ID '{device_id}' removed from '{environment_name}' environment.")
 
-    def control_devices(self, group_by: str, action: str)-> None:
+    def control_devices(self, group_by: str, action: str, target: Optional[str] = None, hops: int = 1,
+                        device_type: Optional[str] = None)-> None:
         """
         Control the devices based on their grouping and desired action.
 
         Parameters:
-        - group_by (str): The criterion to group devices ('type', 'environment', or 'individual').
+        - group_by (str): The criterion to group devices ('type', 'environment', 'individual',
+          'subtree' or 'neighborhood').
         - action (str): The action to perform on devices ('on' or 'off').
+        - target (str): The environment to start from when grouping by 'subtree' or 'neighborhood'.
+        - hops (int): The neighborhood radius when grouping by 'neighborhood'.
+        - device_type (str): Only control devices of this type when grouping by 'subtree' or 'neighborhood'.
         """
         if group_by == "type":
             # Group devices by type
@@ -277,18 +452,97 @@ class SmartHome:
                 print(f"\n{selected_device.__class__.__name__} with ID {selected_device._device_id} turned {action}.")
             else:
                 print("Invalid selection.")
+
+        elif group_by in ("subtree", "neighborhood"):
+            # Control everything below or around one environment
+            print(f"\nTurning {action} all devices in the {group_by} of {target}...")
+            for device in self.select_devices(target, group_by, hops, device_type):
+                if action == "on":
+                    device.turn_on()
+                elif action == "off":
+                    device.turn_off()
         else:
             print("Invalid grouping criteria.")
 
 
 
-    def list_devices_in_environment(self, environment_name)-> List:
-        """List all devices in a specified environment and return the list."""
+    def device_version(self, device_id: str) -> int:
+        """Get the change-log version at which a device last changed, or 0 if it never did."""
+        return self.changes.version_of(("device", device_id))
+
+    def export_changes(self, since: int = 0) -> Iterator[str]:
+        """
+        Stream everything that changed after a version as NDJSON lines.
+
+        The first line is a header with the version the export brings a replica up
+        to. Each following line carries the current state of one changed key:
+        environment upserts, then device upserts, then membership links/unlinks,
+        then device and environment deletions, so a replica can apply them in order.
+        Exporting since version 0 produces a full snapshot.
+
+        Parameters:
+        - since (int): The last version the consumer has already applied.
+
+        Returns:
+        - Iterator[str]: NDJSON lines, each ending with a newline.
+        """
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        yield encode({"since": since, "version": self.changes.version}) + "\n"
+
+        environments, devices, edges, deletions = [], [], [], []
+        for key, version in self.changes.changes_since(since):
+            if key[0] == "device":
+                device = self._device_index.get(key[1])
+                if device is None:
+                    deletions.append({"v": version, "op": "delete", "device_id": key[1]})
+                else:
+                    data = device.to_dict()
+                    del data["online"]
+                    devices.append({"v": version, "op": "upsert", "device": data})
+            elif key[0] == "environment":
+                env = self.environments.get(key[1])
+                if env is not None:
+                    environments.append({"v": version, "op": "upsert_environment", "environment": key[1],
+                                         "kind": env.kind, "parent": env.parent.name if env.parent else None,
+                                         "neighbors": sorted(neighbor.name for neighbor in env.neighbors)})
+                else:
+                    deletions.append({"v": version, "op": "delete_environment", "environment": key[1]})
+            else:
+                env = self.environments.get(key[1])
+                device = self._device_index.get(key[2])
+                linked = env is not None and device is not None and env.has_device(device)
+                edges.append({"v": version, "op": "link" if linked else "unlink",
+                              "environment": key[1], "device_id": key[2]})
+
+        for group in (environments, devices, edges, deletions):
+            for record in group:
+                yield encode(record) + "\n"
+
+    def check_device_health(self) -> List[SmartDevice]:
+        """
+        Mark devices that stopped sending heartbeats as offline.
+
+        Returns:
+            List[SmartDevice]: The devices that went offline since the last check.
+        """
+        expired = self.heartbeats.expire()
+        for device in expired:
+            print(f"{device.__class__.__name__} with ID {device._device_id} in {device.location} went offline.")
+        return expired
+
+    def list_devices_in_environment(self, environment_name, include_descendants: bool = False)-> List:
+        """List all devices in a specified environment (and optionally its descendants) and return their IDs."""
         if environment_name not in self.environments:
             print(f"{environment_name} doesn't exist in the smart home.")
             return []
         env = self.environments[environment_name]
-        return env.list_devices()
+        if not include_descendants:
+            return env.list_devices()
+        devices = env.subtree_devices()
+        print(f"Devices in {environment_name} and below:")
+        for device in devices:
+            print(f"  - {device.__class__.__name__} (ID: {device._device_id}) in {device.location}")
+        return [device._device_id for device in devices]
 
 
     def list_all_devices(self)-> List:
@@ -300,8 +554,9 @@ class SmartHome:
         """
         List all environments in the smart home and display the count of each device type within them.
 
-        This method prints the names of all environments along with a breakdown of device types within each environment.
-        It returns a list of environment names.
+        This method prints the names of all environments along with their place in the hierarchy, a breakdown of
+        device types within each environment (rolled up over sub-environments too) and how many of their devices
+        are online or offline. It returns a list of environment names.
 
         Returns:
             List[str]: A list of names of all environments in the smart home.
@@ -310,16 +565,19 @@ class SmartHome:
             print("No environments in the smart home.")
             return []
 
+        self.check_device_health()
         print("Environments in the smart home:")
         for env_name, env in self.environments.items():
-            device_count: Dict[str, int] = {}
-
-            for device in env._devices:
-                device_type = device.__class__.__name__
-                device_count[device_type] = device_count.get(device_type, 0) + 1
+            device_count = env.device_counts()
 
             device_count_str = ", ".join([f"{key}: {value}" for key, value in device_count.items()])
-            print(f"  - {env_name} ({device_count_str})")
+            online, offline = self.heartbeats.health(env_name)
+            placement = f"{env.kind} in {env.parent.name}" if env.parent else env.kind
+            line = f"  - {env_name} [{placement}] ({device_count_str}) [online: {online}, offline: {offline}]"
+            if env.children:
+                total_str = ", ".join([f"{key}: {value}" for key, value in env.device_counts(True).items()])
+                line += f" (including sub-environments: {total_str})"
+            print(line)
 
         return list(self.environments.keys())
 
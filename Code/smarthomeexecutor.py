@@ -0,0 +1,129 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from smartdevice import SmartDevice
+from smarthome import SmartHome
+
+_STOP = object()
+
+
+class SmartHomeExecutor:
+    """
+    Serializes all access to a SmartHome through a single writer thread.
+
+    SmartHome, its environments and their indexes are not thread-safe. Instead of
+    locking each structure, callers from any thread submit commands to a queue and
+    one writer thread applies them in order, draining up to `max_batch` commands
+    per wake-up. Reads go through the queue too, so they always see a consistent
+    home.
+
+    State shared between homes (the MultiHomeManager indexes and the interned
+    DeviceTemplates) is guarded by its own locks, so each home of a manager can
+    be driven by a separate executor.
+
+    Usage:
+        with SmartHomeExecutor(home) as executor:
+            executor.call("add_device_to_environment", "light1", "kitchen")
+            devices = executor.submit(lambda home: home.select_devices("floor1", "subtree")).result()
+    """
+
+    def __init__(self, home: SmartHome, max_batch: int = 256) -> None:
+        self.home = home
+        self.max_batch = max_batch
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        # Makes the closed check and the put atomic, so nothing is queued after the stop marker.
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="SmartHomeExecutor", daemon=True)
+        self._thread.start()
+
+    def submit(self, command: Callable[[SmartHome], Any]) -> Future:
+        """Queue a function of the home to run on the writer thread and return a Future for its result."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SmartHomeExecutor is closed.")
+            self._queue.put((command, future))
+        return future
+
+    def call(self, method_name: str, *args, **kwargs) -> Any:
+        """Run a SmartHome method on the writer thread and wait for its result."""
+        method = getattr(SmartHome, method_name)
+        return self.submit(lambda home: method(home, *args, **kwargs)).result()
+
+    def close(self) -> None:
+        """Apply every queued command, then stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self) -> "SmartHomeExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for index, item in enumerate(batch):
+                if item is _STOP:
+                    self._cancel_pending(batch[index + 1:])
+                    return
+                command, future = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(command(self.home))
+                    except BaseException as error:
+                        future.set_exception(error)
+
+    def _cancel_pending(self, items: list) -> None:
+        # Nothing should follow the stop marker, but never leave a caller waiting on a Future.
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for item in items:
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("SmartHomeExecutor was closed before the command ran."))
+
+
+def move_device(source: SmartHomeExecutor, target: SmartHomeExecutor, device_id: str) -> Optional[SmartDevice]:
+    """
+    Move a device from one home to another, each driven by its own executor.
+
+    The device leaves the source home before it joins the target, so it is never
+    in both at once. If the target already has a device with that ID, the device
+    is put back into the source home.
+
+    Returns:
+        Optional[SmartDevice]: The moved device, or None if it could not be moved.
+
+    Raises:
+        RuntimeError: If the target rejected the device and the source has reused its
+        ID in the meantime, so the device could not be put back into either home.
+    """
+    def take(home: SmartHome) -> Optional[SmartDevice]:
+        device = home.get_device(device_id)
+        if device is not None:
+            home.remove_device(device_id)
+        return device
+
+    device = source.submit(take).result()
+    if device is None:
+        return None
+    if target.submit(lambda home: home.register_device(device)).result():
+        return device
+    if not source.submit(lambda home: home.register_device(device)).result():
+        raise RuntimeError(f"Device {device_id} could not be moved or returned; it is no longer in any home.")
+    return None
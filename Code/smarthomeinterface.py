@@ -140,16 +140,21 @@ class SmartHomeInterface:
             print("No devices available in the smart home.")
             return
 
+        self.home.check_device_health()
+        heartbeats = self.home.heartbeats
+        print(f"Online: {heartbeats.online_count}, Offline: {heartbeats.offline_count}")
+
         for device in devices:
             device_type = device.__class__.__name__
             device_id = device._device_id
             device_status = device.status
             device_location = device.location
+            device_presence = "online" if device.is_online else "offline"
             details = device.get_details()
             
             # Formatting the details
             details_str = ", ".join([f"{key}: {value}" for key, value in details.items()])
-            print(f"{device_type} (ID: {device_id}) - {details_str} Status : {device_status}, Is in : {device_location} ")
+            print(f"{device_type} (ID: {device_id}) - {details_str} Status : {device_status}, Is in : {device_location}, Presence : {device_presence} ")
 
         print("\n")
 
@@ -162,15 +167,15 @@ class SmartHomeInterface:
             print("No environments available in the smart home.")
             return
 
+        self.home.check_device_health()
+
         for env_name, env in environments.items():
             if env._devices:
-                device_count = {}
-                for device in env._devices:
-                    device_type = device.__class__.__name__
-                    device_count[device_type] = device_count.get(device_type, 0) + 1
+                device_count = env.device_counts()
 
                 devices_in_env = ", ".join([f"{k}: {v}" for k, v in device_count.items()])
-                print(f"- {env_name} (Devices: {devices_in_env})")
+                online, offline = self.home.heartbeats.health(env_name)
+                print(f"- {env_name} (Devices: {devices_in_env}) (Online: {online}, Offline: {offline})")
             else:
                 print(f"- {env_name} (No devices)")
 
@@ -233,9 +238,8 @@ class SmartHomeInterface:
         # 3. If found, display the device's attributes
         if device:
             print("\nDevice Attributes:")
-            for attr, value in vars(device).items():
-                if not attr.startswith("_"):  # Skip private/protected attributes
-                    print(f"{attr}: {value}")
+            for attr, value in device.attributes().items():
+                print(f"{attr}: {value}")
         # 4. If not found, inform the user
         else:
             print("Device not found!")
@@ -253,7 +257,7 @@ class SmartHomeInterface:
         for device in self.home._devices:
             if device._device_id == criterion:
                 return device
-            for attr, value in vars(device).items():
+            for attr, value in device.attributes().items():
                 if str(value) == criterion:
                     return device
         return None
@@ -0,0 +1,588 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from smarthome import DEVICE_TYPES, SmartHome
+from smartdevice import SmartDevice
+from wireformat import check_field, encode_devices
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 256
+WIRE_CONTENT_TYPE = "application/vnd.smarthome-wire"
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    """An error that is reported to the client as a JSON response with the given status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _NullWriter(io.TextIOBase):
+    """A text stream that discards everything written to it."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+class SmartHomeServer:
+    """
+    An asyncio HTTP/1.1 server exposing SmartHome operations as a JSON API.
+
+    Connections are kept alive between requests. Listings are paginated with
+    `offset`/`limit`, and can be streamed as chunked NDJSON by passing
+    `format=ndjson` or sending `Accept: application/x-ndjson`. Device listings
+    can also be fetched in the binary wire format (see wireformat.py) with
+    `format=wire`. `POST /batch` applies a list of operations in a single request.
+
+    Endpoints:
+    - GET/POST /devices, GET/PATCH/DELETE /devices/{id}, POST /devices/{id}/heartbeat
+    - GET/POST /environments, GET/PATCH/DELETE /environments/{name}
+    - PUT/DELETE /environments/{name}/devices/{id}, PUT/DELETE /environments/{name}/neighbors/{name}
+    - POST /control, GET /search?q=..., GET /health, POST /batch
+    """
+
+    def __init__(self, home: SmartHome, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self.home = home
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        # SmartHome reports progress with print(); keep that off the server's stdout.
+        self._quiet = _NullWriter()
+
+    async def start(self) -> None:
+        """Start listening. The bound port is stored in `self.port`."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Start the server if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write_json(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                           {"error": "Request headers too large."}, keep_alive=False)
+                    break
+
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                    body = await self._read_body(reader, headers)
+                except HTTPError as error:
+                    await self._write_json(writer, error.status, {"error": error.message}, keep_alive=False)
+                    break
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = connection == "keep-alive"
+                else:
+                    keep_alive = connection != "close"
+
+                url = urlsplit(target)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                stream = query.get("format") == "ndjson" or "application/x-ndjson" in headers.get("accept", "")
+
+                if query.get("format") == "wire" and method == "GET" and url.path in ("/devices", "/search"):
+                    rows = self._stream_rows(url.path, query)
+                    if rows is not None:
+                        try:
+                            wire = encode_devices(rows)
+                        except ValueError as error:
+                            # Some device state doesn't fit the wire schema; the JSON formats still work.
+                            await self._write_json(writer, HTTPStatus.NOT_ACCEPTABLE, {"error": str(error)},
+                                                   keep_alive)
+                        else:
+                            await self._write_body(writer, HTTPStatus.OK, wire, WIRE_CONTENT_TYPE, keep_alive)
+                        if not keep_alive:
+                            break
+                        continue
+
+                if stream and method == "GET":
+                    rows = self._stream_rows(url.path, query)
+                    if rows is not None:
+                        await self._write_ndjson(writer, rows, keep_alive)
+                        if not keep_alive:
+                            break
+                        continue
+
+                status, payload = self.handle(method, url.path, query, body)
+                await self._write_json(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    def _parse_head(self, head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version, headers
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> Optional[object]:
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported.")
+        length = headers.get("content-length", "0")
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+        if length == 0:
+            return None
+        raw = await reader.readexactly(length)
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON.")
+
+    async def _write_json(self, writer: asyncio.StreamWriter, status: int, payload: object, keep_alive: bool) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        await self._write_body(writer, status, body, "application/json", keep_alive)
+
+    async def _write_body(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                          keep_alive: bool) -> None:
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    async def _write_ndjson(self, writer: asyncio.StreamWriter, rows: List[dict], keep_alive: bool) -> None:
+        head = ("HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/x-ndjson\r\n"
+                "Transfer-Encoding: chunked\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode())
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        for start in range(0, len(rows), STREAM_CHUNK_SIZE):
+            chunk = "".join(encode(row.to_dict() if isinstance(row, SmartDevice) else row) + "\n"
+                            for row in rows[start:start + STREAM_CHUNK_SIZE]).encode()
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _stream_rows(self, path: str, query: Dict[str, str]) -> Optional[List]:
+        """Return a snapshot of the rows for a streamable listing, or None if the path isn't one."""
+        with contextlib.redirect_stdout(self._quiet):
+            try:
+                if path == "/devices":
+                    rows = self._filter_devices(query)
+                elif path == "/environments":
+                    self.home.check_device_health()
+                    rows = [self._environment_dict(name) for name in self.home.environments]
+                elif path == "/search":
+                    rows = self._search(query)
+                else:
+                    return None
+                return self._page(rows, query, default_limit=None)
+            except Exception:
+                # handle() reports the error as a regular JSON response.
+                return None
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Optional[object]) -> Tuple[int, object]:
+        """
+        Apply a single API request to the smart home.
+
+        Returns:
+            Tuple[int, object]: The HTTP status code and the JSON-serializable response payload.
+        """
+        with contextlib.redirect_stdout(self._quiet):
+            try:
+                return self._route(method, path, query, body)
+            except HTTPError as error:
+                return error.status, {"error": error.message}
+            except Exception as error:
+                # Report anything the route checks missed instead of dropping the connection.
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"}
+
+    def _route(self, method: str, path: str, query: Dict[str, str], body: Optional[object]) -> Tuple[int, object]:
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+
+        if parts == ["devices"]:
+            if method == "GET":
+                return HTTPStatus.OK, self._page_payload("devices", self._filter_devices(query), query)
+            if method == "POST":
+                return self._create_device(self._body_dict(body))
+        elif len(parts) == 2 and parts[0] == "devices":
+            device = self._device(parts[1])
+            if method == "GET":
+                return HTTPStatus.OK, device.to_dict()
+            if method == "PATCH":
+                return self._update_device(device, self._body_dict(body))
+            if method == "DELETE":
+                self.home.remove_device(device._device_id)
+                return HTTPStatus.OK, {"deleted": device._device_id}
+        elif len(parts) == 3 and parts[0] == "devices" and parts[2] == "heartbeat":
+            if method == "POST":
+                device = self._device(parts[1])
+                device.heartbeat()
+                return HTTPStatus.OK, {"id": device._device_id, "online": device.is_online}
+        elif parts == ["environments"]:
+            if method == "GET":
+                self.home.check_device_health()
+                rows = [self._environment_dict(name) for name in self.home.environments]
+                return HTTPStatus.OK, self._page_payload("environments", rows, query)
+            if method == "POST":
+                body = self._body_dict(body)
+                name = body.get("name")
+                if not isinstance(name, str) or not name:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Environment 'name' is required.")
+                if name in self.home.environments:
+                    raise HTTPError(HTTPStatus.CONFLICT, f"Environment '{name}' already exists.")
+                parent = body.get("parent")
+                if parent is not None:
+                    self._environment(parent)
+                kind = self._kind(body.get("kind", "room"))
+                self.home.add_or_update_environment(name, kind=kind, parent=parent)
+                return HTTPStatus.CREATED, self._environment_dict(name)
+        elif len(parts) == 2 and parts[0] == "environments":
+            if method == "GET":
+                self._environment(parts[1])
+                self.home.check_device_health()
+                return HTTPStatus.OK, self._environment_dict(parts[1])
+            if method == "PATCH":
+                env = self._environment(parts[1])
+                body = self._body_dict(body)
+                kind = self._kind(body["kind"]) if "kind" in body else env.kind
+                if "parent" in body:
+                    parent = self._environment(body["parent"]) if body["parent"] is not None else None
+                    if not env.set_parent(parent):
+                        raise HTTPError(HTTPStatus.CONFLICT, f"Cannot place {env.name} inside its own subtree.")
+                if kind != env.kind:
+                    env.kind = kind
+                    if env._changelog is not None:
+                        env._changelog.record(("environment", env.name))
+                return HTTPStatus.OK, self._environment_dict(env.name)
+            if method == "DELETE":
+                self._environment(parts[1])
+                self.home.remove_environment(parts[1])
+                return HTTPStatus.OK, {"deleted": parts[1]}
+        elif len(parts) == 4 and parts[0] == "environments" and parts[2] == "neighbors":
+            env = self._environment(parts[1])
+            other = self._environment(parts[3])
+            if method == "PUT":
+                env.connect(other)
+                return HTTPStatus.OK, self._environment_dict(env.name)
+            if method == "DELETE":
+                env.disconnect(other)
+                return HTTPStatus.OK, self._environment_dict(env.name)
+        elif len(parts) == 4 and parts[0] == "environments" and parts[2] == "devices":
+            env = self._environment(parts[1])
+            device = self._device(parts[3])
+            if method == "PUT":
+                if not env.has_device(device):
+                    self.home.add_device_to_environment(device._device_id, env.name)
+                return HTTPStatus.OK, self._environment_dict(env.name)
+            if method == "DELETE":
+                if not env.has_device(device):
+                    raise HTTPError(HTTPStatus.NOT_FOUND,
+                                    f"Device '{device._device_id}' is not in '{env.name}'.")
+                self.home.remove_device_from_environment(device._device_id, env.name)
+                return HTTPStatus.OK, self._environment_dict(env.name)
+        elif parts == ["control"]:
+            if method == "POST":
+                return self._control(self._body_dict(body))
+        elif parts == ["search"]:
+            if method == "GET":
+                return HTTPStatus.OK, self._page_payload("devices", self._search(query), query)
+        elif parts == ["health"]:
+            if method == "GET":
+                expired = self.home.check_device_health()
+                return HTTPStatus.OK, {
+                    "online": self.home.heartbeats.online_count,
+                    "offline": self.home.heartbeats.offline_count,
+                    "newly_offline": [device._device_id for device in expired],
+                }
+        elif parts == ["batch"]:
+            if method == "POST":
+                return self._batch(self._body_dict(body))
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {path}")
+
+    def _batch(self, body: dict) -> Tuple[int, object]:
+        operations = body.get("operations")
+        if not isinstance(operations, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'operations' must be a list.")
+        results = []
+        for operation in operations:
+            if not isinstance(operation, dict) or not isinstance(operation.get("method"), str) \
+                    or not isinstance(operation.get("path"), str):
+                results.append({"status": HTTPStatus.BAD_REQUEST,
+                                "body": {"error": "Each operation needs a 'method' and a 'path' string."}})
+                continue
+            url = urlsplit(operation["path"])
+            if url.path.rstrip("/") == "/batch":
+                results.append({"status": HTTPStatus.BAD_REQUEST, "body": {"error": "Batches cannot be nested."}})
+                continue
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                status, payload = self._route(operation["method"].upper(), url.path, query,
+                                              operation.get("body"))
+            except HTTPError as error:
+                status, payload = error.status, {"error": error.message}
+            except Exception as error:
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"}
+            results.append({"status": int(status), "body": payload})
+        return HTTPStatus.OK, {"results": results}
+
+    def _create_device(self, body: dict) -> Tuple[int, object]:
+        fields = dict(body)
+        device_type = fields.pop("type", None)
+        device_id = fields.pop("id", None)
+        self._device_class(device_type)
+        if not isinstance(device_id, str) or not device_id:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Device 'id' is required.")
+        if "location" in fields:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            "Set a device's location with PUT /environments/{name}/devices/{id}.")
+        if self.home.get_device(device_id) is not None:
+            raise HTTPError(HTTPStatus.CONFLICT, f"Device with ID {device_id} already exists!")
+        device = self.home.create_device(device_type, device_id)
+        self._check_fields(device, fields)
+        self._apply_fields(device, fields)
+        self.home.register_device(device)
+        return HTTPStatus.CREATED, device.to_dict()
+
+    def _update_device(self, device: SmartDevice, body: dict) -> Tuple[int, object]:
+        self._check_fields(device, body)
+        self._apply_fields(device, body)
+        return HTTPStatus.OK, device.to_dict()
+
+    @staticmethod
+    def _check_fields(device: SmartDevice, fields: dict) -> None:
+        """Reject writes to unknown fields and values whose type differs from the field's current value."""
+        for field, value in fields.items():
+            if field == "status":
+                if value not in ("on", "off"):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "'status' must be 'on' or 'off'.")
+            elif field not in device.state_fields:
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                f"{type(device).__name__} has no writable field '{field}'.")
+            elif type(value) is not type(getattr(device, field)):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                f"'{field}' must be of type {type(getattr(device, field)).__name__}.")
+            else:
+                # Keep every stored value encodable, so wire listings can't start failing with 406.
+                try:
+                    check_field(type(device), field, value)
+                except ValueError as error:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, str(error))
+
+    @staticmethod
+    def _apply_fields(device: SmartDevice, fields: dict) -> None:
+        for field, value in fields.items():
+            if field == "status":
+                if value == "on":
+                    device.turn_on()
+                else:
+                    device.turn_off()
+            else:
+                setattr(device, field, value)
+
+    def _control(self, body: dict) -> Tuple[int, object]:
+        group_by = body.get("group_by")
+        action = body.get("action")
+        target = body.get("target")
+        if action not in ("on", "off"):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'action' must be 'on' or 'off'.")
+
+        if group_by == "type":
+            if target is None:
+                devices = self.home._devices
+            else:
+                device_class = self._device_class(target)
+                devices = [device for device in self.home._devices if type(device) is device_class]
+        elif group_by == "environment":
+            if target is None:
+                devices = [device for env in self.home.environments.values() for device in env._devices]
+            else:
+                devices = self._environment(target)._devices
+        elif group_by == "individual":
+            ids = target if isinstance(target, list) else [target]
+            devices = [self._device(device_id) for device_id in ids]
+        elif group_by in ("subtree", "neighborhood"):
+            devices = self._scoped_devices(target, group_by, body.get("hops", 1), body.get("device_type"))
+        else:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'group_by' must be 'type', 'environment', 'individual', "
+                                                    "'subtree' or 'neighborhood'.")
+
+        for device in devices:
+            if action == "on":
+                device.turn_on()
+            else:
+                device.turn_off()
+        return HTTPStatus.OK, {"action": action, "devices": [device._device_id for device in devices]}
+
+    def _scoped_devices(self, environment_name: str, scope: str, hops: object,
+                        device_type: Optional[str]) -> List[SmartDevice]:
+        self._environment(environment_name)
+        if type(hops) is not int or hops < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'hops' must be a non-negative integer.")
+        if device_type is not None:
+            self._device_class(device_type)
+        return self.home.select_devices(environment_name, scope, hops, device_type)
+
+    def _filter_devices(self, query: Dict[str, str]) -> List[SmartDevice]:
+        if "environment" in query:
+            scope = query.get("scope", "environment")
+            if scope not in ("environment", "subtree", "neighborhood"):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown scope: {scope}")
+            devices = self._scoped_devices(query["environment"], scope, self._int_param(query, "hops", 1), None)
+        else:
+            devices = self.home._devices
+        if "type" in query:
+            device_class = self._device_class(query["type"])
+            return [device for device in devices if type(device) is device_class]
+        return list(devices)
+
+    def _search(self, query: Dict[str, str]) -> List[SmartDevice]:
+        criterion = query.get("q")
+        if not criterion:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Query parameter 'q' is required.")
+        device = self.home.get_device(criterion)
+        matches = [device] if device is not None else []
+        for device in self.home._devices:
+            if device._device_id != criterion and any(str(value) == criterion
+                                                      for value in device.attributes().values()):
+                matches.append(device)
+        return matches
+
+    def _page(self, rows: List, query: Dict[str, str], default_limit: Optional[int] = DEFAULT_PAGE_SIZE) -> List:
+        offset = self._int_param(query, "offset", 0)
+        limit = self._int_param(query, "limit", default_limit)
+        if limit is None:
+            return rows[offset:]
+        return rows[offset:offset + min(limit, MAX_PAGE_SIZE)]
+
+    def _page_payload(self, key: str, rows: List, query: Dict[str, str]) -> dict:
+        page = self._page(rows, query)
+        return {
+            key: [row.to_dict() if isinstance(row, SmartDevice) else row for row in page],
+            "total": len(rows),
+            "offset": self._int_param(query, "offset", 0),
+            "limit": len(page),
+        }
+
+    def _environment_dict(self, name: str) -> dict:
+        env = self.home.environments[name]
+        online, offline = self.home.heartbeats.health(name)
+        return {
+            "name": name,
+            "kind": env.kind,
+            "parent": env.parent.name if env.parent else None,
+            "children": [child.name for child in env.children],
+            "neighbors": sorted(neighbor.name for neighbor in env.neighbors),
+            "devices": [device._device_id for device in env._devices],
+            "device_counts": env.device_counts(include_descendants=True),
+            "online": online,
+            "offline": offline,
+        }
+
+    def _device(self, device_id: str) -> SmartDevice:
+        if not isinstance(device_id, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Device IDs must be strings.")
+        device = self.home.get_device(device_id)
+        if device is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No device with ID '{device_id}' found.")
+        return device
+
+    def _environment(self, name: str):
+        if not isinstance(name, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Environment names must be strings.")
+        env = self.home.environments.get(name)
+        if env is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"The environment '{name}' doesn't exist.")
+        return env
+
+    @staticmethod
+    def _device_class(device_type: object) -> type:
+        if not isinstance(device_type, str) or device_type not in DEVICE_TYPES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown device type: {device_type}")
+        return DEVICE_TYPES[device_type]
+
+    @staticmethod
+    def _kind(kind: object) -> str:
+        if not isinstance(kind, str) or not kind:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Environment 'kind' must be a non-empty string.")
+        return kind
+
+    @staticmethod
+    def _body_dict(body: Optional[object]) -> dict:
+        if body is None:
+            return {}
+        if not isinstance(body, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+        return body
+
+    @staticmethod
+    def _int_param(query: Dict[str, str], name: str, default: Optional[int]) -> Optional[int]:
+        value = query.get(name)
+        if value is None:
+            return default
+        if not (value.isascii() and value.isdigit()):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a non-negative integer.")
+        return int(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a SmartHome over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = SmartHomeServer(SmartHome(), args.host, args.port)
+
+    async def run():
+        await server.start()
+        print(f"Serving SmartHome API on http://{server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Exiting...")
+
+
+if __name__ == "__main__":
+    main()
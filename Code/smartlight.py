@@ -1,11 +1,15 @@
 from smartdevice import SmartDevice
+from devicetemplate import DeviceTemplate, TemplateField
 from typing import Dict
 
 class SmartLight(SmartDevice):
+    state_fields = ('brightness', 'color')
+    brightness = TemplateField()
+    color = TemplateField()
+
     def __init__(self, device_id, brightness=50, color="white", **kwargs):
         super().__init__(device_id, **kwargs)
-        self.brightness: int = brightness
-        self.color: str = color
+        self._template = DeviceTemplate.intern(SmartLight, brightness=brightness, color=color)
 
     def adjust_brightness(self, new_brightness)-> None:
         """Adjust the light's brightness."""
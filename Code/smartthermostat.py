@@ -1,11 +1,16 @@
 from smartdevice import SmartDevice
+from devicetemplate import DeviceTemplate, TemplateField
 
 class SmartThermostat(SmartDevice):
+    state_fields = ('current_temp', 'desired_temp', 'mode')
+    current_temp = TemplateField()
+    desired_temp = TemplateField()
+    mode = TemplateField()
+
     def __init__(self, device_id, current_temp=20, desired_temp=22, mode="cooling", **kwargs):
         super().__init__(device_id, **kwargs)
-        self.current_temp = current_temp
-        self.desired_temp = desired_temp
-        self.mode = mode
+        self._template = DeviceTemplate.intern(SmartThermostat, current_temp=current_temp,
+                                               desired_temp=desired_temp, mode=mode)
 
     def set_temperature(self, temp):
         """Set the thermostat's temperature."""
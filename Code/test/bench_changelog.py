@@ -0,0 +1,129 @@
+import contextlib
+import os
+import random
+import sys
+import time
+from changelog import apply_changes
+from smarthome import DEVICE_TYPES, SmartHome
+
+DEVICES = 1_000_000
+ENVIRONMENT_SIZE = 1000
+CHANGES = 1000
+VERIFY_DEVICES = 2000
+
+
+def build(devices: int) -> SmartHome:
+    home = SmartHome()
+    for index in range(devices):
+        device_id = f"light{index}"
+        home.register_device(home.create_device("smartlight", device_id))
+        environment_name = f"room{index // ENVIRONMENT_SIZE}"
+        if environment_name not in home.environments:
+            home.add_or_update_environment(environment_name)
+        home.environments[environment_name].add_device(home.get_device(device_id))
+    return home
+
+
+def snapshot(home: SmartHome) -> dict:
+    """Everything an export is expected to carry over to a replica."""
+    devices = {}
+    for device in home._devices:
+        data = device.to_dict()
+        del data["online"]
+        devices[device._device_id] = data
+    environments = {name: (env.kind, env.parent.name if env.parent else None,
+                           sorted(neighbor.name for neighbor in env.neighbors),
+                           sorted(device._device_id for device in env._devices))
+                    for name, env in home.environments.items()}
+    return {"devices": devices, "environments": environments}
+
+
+def mutate(home: SmartHome, rng: random.Random, changes: int) -> None:
+    """Apply random updates, including deletions and IDs re-created as another device type."""
+    for _ in range(changes):
+        device_id = f"light{rng.randrange(VERIFY_DEVICES)}"
+        device = home.get_device(device_id)
+        roll = rng.random()
+        if device is None or roll < 0.1:
+            if device is not None:
+                home.remove_device(device_id)
+            home.register_device(home.create_device(rng.choice(list(DEVICE_TYPES)), device_id))
+        elif roll < 0.2:
+            home.remove_device(device_id)
+        elif roll < 0.4:
+            home.add_device_to_environment(device_id, f"room{rng.randrange(VERIFY_DEVICES // ENVIRONMENT_SIZE)}")
+        elif roll < 0.5:
+            home.connect_environments("room0", "room1")
+        elif roll < 0.6:
+            home.disconnect_environments("room0", "room1")
+        elif roll < 0.8:
+            device.turn_on()
+        else:
+            setattr(device, device.state_fields[0], getattr(device, device.state_fields[0]) + 1)
+
+
+def verify(rng: random.Random) -> list:
+    """Check that a fresh replica and a replica kept in sync with diffs both end up equal to the source."""
+    errors = []
+    home = build(VERIFY_DEVICES)
+    replica, synced = SmartHome(), 0
+    for round_ in range(5):
+        synced = apply_changes(replica, home.export_changes(synced))
+        mutate(home, rng, CHANGES)
+        if round_ == 2:
+            home.remove_environment("room1")
+    apply_changes(replica, home.export_changes(synced))
+    if snapshot(replica) != snapshot(home):
+        errors.append("replica kept in sync with diff exports differs from the source")
+    fresh = SmartHome()
+    apply_changes(fresh, home.export_changes(0))
+    if snapshot(fresh) != snapshot(home):
+        errors.append("replica built from a full export differs from the source")
+    return errors
+
+
+def export_size(lines) -> int:
+    return sum(len(line) for line in lines)
+
+
+def main():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else DEVICES
+    rng = random.Random(0)
+
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        errors = verify(rng)
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print("Replica check: OK")
+
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        start = time.perf_counter()
+        home = build(devices)
+        print(f"Built {devices} devices in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        synced = home.changes.version
+        for _ in range(CHANGES):
+            device = home.get_device(f"light{rng.randrange(devices)}")
+            if rng.random() < 0.5:
+                device.brightness = rng.randrange(101)
+            else:
+                device.turn_on()
+
+        start = time.perf_counter()
+        full_bytes = export_size(home.export_changes(0))
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        diff_bytes = export_size(home.export_changes(synced))
+        diff_time = time.perf_counter() - start
+
+    print(f"Devices: {devices}, changed: {CHANGES}")
+    print(f"Full dump:   {full_time * 1000:10.1f} ms, {full_bytes / 1e6:8.2f} MB")
+    print(f"Diff export: {diff_time * 1000:10.1f} ms, {diff_bytes / 1e6:8.2f} MB")
+    print(f"Speedup: {full_time / diff_time:.0f}x, size reduction: {full_bytes / diff_bytes:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from multihome import MultiHomeManager
+from smartthermostat import SmartThermostat
+
+HOMES = 10_000
+
+
+def build(homes: int, materialize: bool) -> MultiHomeManager:
+    """Build a manager with four default devices per home and one heating thermostat in ten."""
+    manager = MultiHomeManager()
+    for index in range(homes):
+        tenant_id = f"tenant{index}"
+        manager.add_home(tenant_id)
+        manager.add_device(tenant_id, "smartlight", "light1")
+        manager.add_device(tenant_id, "smartcamera", "cam1")
+        manager.add_device(tenant_id, "voiceassistant", "va1")
+        thermostat = manager.add_device(tenant_id, "smartthermostat", "thermo1")
+        if index % 10 == 0:
+            thermostat.mode = "heating"
+    if materialize:
+        # Copy every template value into the device itself, which is how devices were stored before templates.
+        for home in manager.homes.values():
+            for device in home._devices:
+                device.__dict__.update({**device._template.values, **device.__dict__})
+    return manager
+
+
+def measure(homes: int, materialize: bool) -> int:
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = build(homes, materialize)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del manager
+    return used
+
+
+def main():
+    homes = int(sys.argv[1]) if len(sys.argv) > 1 else HOMES
+
+    shared = measure(homes, materialize=False)
+    materialized = measure(homes, materialize=True)
+    print(f"Homes: {homes}")
+    print(f"Shared templates:      {shared / homes:8.0f} bytes per home")
+    print(f"Materialized per home: {materialized / homes:8.0f} bytes per home")
+    print(f"Saving: {100 * (1 - shared / materialized):.1f}%")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = build(homes, materialize=False)
+    start = time.perf_counter()
+    heating = manager.find_devices(SmartThermostat, mode="heating")
+    elapsed = time.perf_counter() - start
+    print(f"Heating thermostats across tenants: {len(heating)} found in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+import random
+import sys
+import time
+from smarthome import DEVICE_TYPES
+from wireformat import decode_devices, encode_devices
+
+DEVICES = 100_000
+REPEAT = 5
+
+
+def build(count: int) -> list:
+    rng = random.Random(0)
+    devices = []
+    for index in range(count):
+        device_type = rng.choice(list(DEVICE_TYPES))
+        device = DEVICE_TYPES[device_type](device_id=f"{device_type}{index}", location=f"room{rng.randrange(50)}")
+        if device_type == "smartlight":
+            device.brightness = rng.randrange(101)
+            device.color = rng.choice(["white", "red", "blue", "warm"])
+        elif device_type == "smartthermostat":
+            device.current_temp = rng.randrange(15, 30)
+            device.mode = rng.choice(["cooling", "heating"])
+        elif device_type == "voiceassistant":
+            device.commands_received = rng.sample(["lights on", "lights off", "play music", "weather"], 2)
+        if rng.random() < 0.5:
+            device.turn_on()
+        devices.append(device)
+    return devices
+
+
+def to_json(devices: list) -> bytes:
+    rows = []
+    for device in devices:
+        row = device.to_dict()
+        del row["online"]
+        rows.append(row)
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+
+def from_json(buffer: bytes) -> list:
+    devices = []
+    for row in json.loads(buffer):
+        device = DEVICE_TYPES[row["type"]](device_id=row["id"], status=row["status"], location=row["location"])
+        for field in device.state_fields:
+            setattr(device, field, row[field])
+        devices.append(device)
+    return devices
+
+
+def best_time(function, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def state(devices: list) -> list:
+    return [device.to_dict() for device in devices]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEVICES
+    devices = build(count)
+
+    wire = encode_devices(devices)
+    text = to_json(devices)
+    assert state(decode_devices(wire)) == state(devices), "wire round trip is not exact"
+    assert state(from_json(text)) == state(devices), "JSON round trip is not exact"
+
+    wire_encode, json_encode = best_time(encode_devices, devices), best_time(to_json, devices)
+    wire_decode, json_decode = best_time(decode_devices, wire), best_time(from_json, text)
+
+    print(f"Devices: {count}")
+    print(f"Size:   wire {len(wire) / 1e6:7.2f} MB, JSON {len(text) / 1e6:7.2f} MB ({len(text) / len(wire):.1f}x smaller)")
+    print(f"Encode: wire {wire_encode * 1000:7.1f} ms, JSON {json_encode * 1000:7.1f} ms "
+          f"({json_encode / wire_encode:.1f}x faster)")
+    print(f"Decode: wire {wire_decode * 1000:7.1f} ms, JSON {json_decode * 1000:7.1f} ms "
+          f"({json_decode / wire_decode:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
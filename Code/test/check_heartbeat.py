@@ -0,0 +1,105 @@
+import sys
+from typing import List
+from heartbeat import HeartbeatTracker
+from smartlight import SmartLight
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def check_expiry(errors: List[str]) -> None:
+    clock = FakeClock(100.0)
+    tracker = HeartbeatTracker(timeout=5.0, bucket_width=1.0, clock=clock)
+    early, late = SmartLight("early", location="kitchen"), SmartLight("late", location="kitchen")
+    tracker.register(early)
+    clock.now = 103.0
+    tracker.register(late)
+
+    clock.now = 104.5
+    if tracker.expire() or not tracker.is_online(early):
+        errors.append("expiry: device expired before its timeout")
+
+    clock.now = 107.0
+    if not tracker.is_online(late) or tracker.is_online(early):
+        errors.append("expiry: is_online disagrees with last_seen before expire()")
+    if tracker.health("kitchen") != (2, 0):
+        errors.append(f"expiry: counts changed before expire(): {tracker.health('kitchen')}")
+    if tracker.expire() != [early]:
+        errors.append("expiry: expected only the early device to go offline")
+    if tracker.health("kitchen") != (1, 1) or (tracker.online_count, tracker.offline_count) != (1, 1):
+        errors.append(f"expiry: wrong counts after expire(): {tracker.health('kitchen')}")
+    if tracker.expire():
+        errors.append("expiry: a device expired twice")
+
+    tracker.beat(early)
+    if not tracker.is_online(early) or tracker.health("kitchen") != (2, 0):
+        errors.append("expiry: a heartbeat did not bring the device back online")
+    clock.now = 200.0
+    if len(tracker.expire()) != 2 or tracker.health("kitchen") != (0, 2):
+        errors.append("expiry: not every device expired after a long silence")
+
+
+def check_slot_reuse(errors: List[str]) -> None:
+    clock = FakeClock()
+    tracker = HeartbeatTracker(timeout=5.0, clock=clock)
+    first, second = SmartLight("first", location="hall"), SmartLight("second", location="hall")
+    tracker.register(first)
+    slot = first._slot
+    tracker.unregister(first)
+    if first._tracker is not None or tracker.health("hall") != (0, 0):
+        errors.append("slot reuse: unregister left the device tracked")
+
+    clock.now = 3.0
+    tracker.register(second)
+    if second._slot != slot:
+        errors.append("slot reuse: the freed slot was not reused")
+    if tracker.last_seen(second) != 3.0 or tracker.last_seen(first) is not None:
+        errors.append("slot reuse: last_seen leaked between devices")
+
+    # The first device's old deadline (t=5) must not expire the device now in its slot.
+    clock.now = 7.0
+    if tracker.expire() or not tracker.is_online(second):
+        errors.append("slot reuse: a stale deadline expired the new device")
+    clock.now = 10.0
+    if tracker.expire() != [second]:
+        errors.append("slot reuse: the new device did not expire on its own deadline")
+
+
+def check_relocate(errors: List[str]) -> None:
+    clock = FakeClock()
+    tracker = HeartbeatTracker(timeout=5.0, clock=clock)
+    online, offline = SmartLight("online", location="kitchen"), SmartLight("offline", location="kitchen")
+    tracker.register(offline)
+    clock.now = 4.0
+    tracker.register(online)
+    clock.now = 7.0
+    tracker.expire()
+
+    online.location = "bedroom"
+    offline.location = "bedroom"
+    if tracker.health("kitchen") != (0, 0) or tracker.health("bedroom") != (1, 1):
+        errors.append(f"relocate: counts did not move: {tracker.health('kitchen')} {tracker.health('bedroom')}")
+
+    clock.now = 20.0
+    tracker.expire()
+    if tracker.health("bedroom") != (0, 2) or tracker.health("kitchen") != (0, 0):
+        errors.append("relocate: expiry was counted against the old location")
+
+
+def main():
+    errors: List[str] = []
+    for check in (check_expiry, check_slot_reuse, check_relocate):
+        check(errors)
+    for error in errors:
+        print(error)
+    print("HeartbeatTracker: OK" if not errors else f"HeartbeatTracker: {len(errors)} failures")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+from typing import List
+from devicetemplate import DeviceTemplate
+from smartlight import SmartLight
+from smartthermostat import SmartThermostat
+
+
+def check_interning(errors: List[str]) -> None:
+    if DeviceTemplate.intern(SmartLight, brightness=1, color="x") is not \
+            DeviceTemplate.intern(SmartLight, color="x", brightness=1):
+        errors.append("interning: keyword order produced separate templates")
+    if SmartLight("a")._template is not SmartLight("b")._template:
+        errors.append("interning: default devices don't share a template")
+
+
+def check_value_types(errors: List[str]) -> None:
+    # 1, 1.0 and True compare equal, but they are different configurations.
+    float_light, int_light, bool_light = (SmartLight("float", brightness=1.0), SmartLight("int", brightness=1),
+                                          SmartLight("bool", brightness=True))
+    for device, expected in ((float_light, 1.0), (int_light, 1), (bool_light, True)):
+        if type(device.brightness) is not type(expected):
+            errors.append(f"value types: brightness={expected!r} reads back as {device.brightness!r}")
+
+    float_thermostat = SmartThermostat("float", current_temp=20.0)
+    if type(SmartThermostat("default").current_temp) is not int or type(float_thermostat.current_temp) is not float:
+        errors.append("value types: a float configuration leaked into default thermostats")
+
+
+def check_unhashable(errors: List[str]) -> None:
+    try:
+        light = SmartLight("list", color=["r"])
+    except TypeError as error:
+        errors.append(f"unhashable: {error}")
+        return
+    if light.color != ["r"] or SmartLight("plain").color != "white":
+        errors.append("unhashable: wrong color for a device with an unhashable default")
+
+
+def main():
+    errors: List[str] = []
+    for check in (check_interning, check_value_types, check_unhashable):
+        check(errors)
+    for error in errors:
+        print(error)
+    print("DeviceTemplate: OK" if not errors else f"DeviceTemplate: {len(errors)} failures")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from smarthome import SmartHome
+from smarthomeserver import SmartHomeServer
+
+
+async def request(reader, writer, method: str, path: str, body=None):
+    """Send one request on a keep-alive connection and read the whole response."""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            await reader.readexactly(int(line.split(b":", 1)[1]))
+            return status
+    # Chunked response
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        await reader.readexactly(size + 2)
+        if size == 0:
+            return status
+
+
+async def seed(host: str, port: int, devices: int) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    operations = [{"method": "POST", "path": "/environments", "body": {"name": f"room{room}"}} for room in range(10)]
+    for index in range(devices):
+        operations.append({"method": "POST", "path": "/devices",
+                           "body": {"type": "smartlight", "id": f"light{index}"}})
+        operations.append({"method": "PUT", "path": f"/environments/room{index % 10}/devices/light{index}"})
+    await request(reader, writer, "POST", "/batch", {"operations": operations})
+    writer.close()
+
+
+async def client(host: str, port: int, requests: int, devices: int, latencies: list, errors: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    for _ in range(requests):
+        roll = rng.random()
+        device_id = f"light{rng.randrange(devices)}"
+        start = time.perf_counter()
+        if roll < 0.5:
+            status = await request(reader, writer, "GET", f"/devices/{device_id}")
+        elif roll < 0.7:
+            status = await request(reader, writer, "PATCH", f"/devices/{device_id}",
+                                   {"brightness": rng.randrange(101)})
+        elif roll < 0.9:
+            status = await request(reader, writer, "GET", f"/devices?offset={rng.randrange(devices)}&limit=20")
+        else:
+            operations = [{"method": "PATCH", "path": f"/devices/light{rng.randrange(devices)}",
+                           "body": {"status": rng.choice(["on", "off"])}} for _ in range(20)]
+            status = await request(reader, writer, "POST", "/batch", {"operations": operations})
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append(status)
+    writer.close()
+
+
+def start_server_thread() -> SmartHomeServer:
+    """Run a fresh server on a free port in a background thread."""
+    server = SmartHomeServer(SmartHome(), port=0)
+    ready = threading.Event()
+
+    def run():
+        async def serve():
+            await server.start()
+            ready.set()
+            await server.serve_forever()
+        asyncio.run(serve())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server
+
+
+async def run_load(host: str, port: int, connections: int, requests: int, devices: int) -> None:
+    await seed(host, port, devices)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, devices, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"Requests: {len(latencies)} over {connections} keep-alive connections in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"Latency p50: {percentiles[49] * 1000:.2f} ms, p95: {percentiles[94] * 1000:.2f} ms, "
+          f"p99: {percentiles[98] * 1000:.2f} ms, max: {latencies[-1] * 1000:.2f} ms")
+    print(f"Errors: {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the SmartHome HTTP API on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Port of a running server. Starts one in-process if omitted.")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per connection.")
+    parser.add_argument("--devices", type=int, default=1000)
+    args = parser.parse_args()
+
+    port = args.port
+    if port is None:
+        port = start_server_thread().port
+    asyncio.run(run_load(args.host, port, args.connections, args.requests, args.devices))
+
+
+if __name__ == "__main__":
+    main()
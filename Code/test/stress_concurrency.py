@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+from typing import Dict, List
+from smarthome import DEVICE_TYPES, SmartHome
+from smarthomeexecutor import SmartHomeExecutor, move_device
+
+ROOMS_PER_HOME = 8
+# IDs every worker draws from, so the same ID turns up in several homes and moves can collide.
+SHARED_IDS = 64
+
+
+def build_home() -> SmartHome:
+    home = SmartHome()
+    home.add_or_update_environment("house", kind="building")
+    for floor in range(2):
+        home.add_or_update_environment(f"floor{floor}", kind="floor", parent="house")
+    for room in range(ROOMS_PER_HOME):
+        home.add_or_update_environment(f"room{room}", parent=f"floor{room % 2}")
+        if room:
+            home.connect_environments(f"room{room - 1}", f"room{room}")
+    return home
+
+
+def home_invariants(home: SmartHome) -> List[str]:
+    """Check that a home's devices, environments and indexes agree with each other."""
+    errors = []
+    if len(home._device_index) != len(home._devices) or any(
+            home._device_index.get(device._device_id) is not device for device in home._devices):
+        errors.append("device index out of sync with device list")
+    devices = set(home._devices)
+
+    for name, env in home.environments.items():
+        if set(env._devices) != env._members or len(env._devices) != len(env._members):
+            errors.append(f"{name}: membership set out of sync with device list")
+        if not env._members <= devices:
+            errors.append(f"{name}: contains devices that are not in the home")
+        counts: Dict[str, int] = {}
+        for device in env._devices:
+            counts[device.__class__.__name__] = counts.get(device.__class__.__name__, 0) + 1
+        if counts != env.device_counts():
+            errors.append(f"{name}: device counts {env.device_counts()} != {counts}")
+
+        subtree, stack = [], list(env.children)
+        while stack:
+            child = stack.pop()
+            subtree.append(child)
+            stack.extend(child.children)
+        if set(subtree) != set(env._descendants):
+            errors.append(f"{name}: descendant index out of sync with children")
+        rolled_up = dict(counts)
+        for child in subtree:
+            for device_type, count in child.device_counts().items():
+                rolled_up[device_type] = rolled_up.get(device_type, 0) + count
+        if rolled_up != env.device_counts(include_descendants=True):
+            errors.append(f"{name}: rolled-up counts out of sync")
+
+    for device in home._devices:
+        if device._tracker is not home.heartbeats:
+            errors.append(f"{device.device_id}: not tracked by this home")
+        location = device.location
+        if location != "unknown" and (location not in home.environments
+                                      or not home.environments[location].has_device(device)):
+            errors.append(f"{device.device_id}: located in {location} but not linked to it")
+
+    heartbeats = home.heartbeats
+    if heartbeats.online_count + heartbeats.offline_count != len(home._devices):
+        errors.append("heartbeat totals don't match the number of devices")
+    return errors
+
+
+def worker(executors: List[SmartHomeExecutor], worker_id: int, operations: int, seed: int, stats: dict) -> None:
+    rng = random.Random(seed)
+    created = 0
+    known_ids: List[str] = []
+    for _ in range(operations):
+        executor = rng.choice(executors)
+        roll = rng.random()
+
+        if roll < 0.2 or not known_ids:
+            if rng.random() < 0.5:
+                device_id = f"shared{rng.randrange(SHARED_IDS)}"
+            else:
+                device_id = f"w{worker_id}-{created}"
+                created += 1
+            device_type = rng.choice(list(DEVICE_TYPES))
+            if executor.submit(lambda home: home.register_device(home.create_device(device_type, device_id))).result():
+                stats["created"] += 1
+            if device_id not in known_ids:
+                known_ids.append(device_id)
+        elif roll < 0.3:
+            device_id = rng.choice(known_ids)
+            if executor.submit(lambda home: home.get_device(device_id) is not None and
+                               (home.remove_device(device_id) or True)).result():
+                stats["removed"] += 1
+        elif roll < 0.5:
+            executor.call("add_device_to_environment", rng.choice(known_ids), f"room{rng.randrange(ROOMS_PER_HOME)}")
+        elif roll < 0.6:
+            executor.call("remove_device_from_environment", rng.choice(known_ids),
+                          f"room{rng.randrange(ROOMS_PER_HOME)}")
+        elif roll < 0.7:
+            target = rng.choice(executors)
+            if target is not executor:
+                try:
+                    move_device(executor, target, rng.choice(known_ids))
+                except RuntimeError:
+                    # The source reused the ID while the device was in transit.
+                    stats["lost"] += 1
+        elif roll < 0.8:
+            group_by = rng.choice(["type", "environment", "subtree", "neighborhood"])
+            executor.call("control_devices", group_by, rng.choice(["on", "off"]),
+                          target=f"room{rng.randrange(ROOMS_PER_HOME)}", hops=2)
+        elif roll < 0.9:
+            device_id = rng.choice(known_ids)
+
+            def touch(home, device_id=device_id):
+                device = home.get_device(device_id)
+                if device is not None:
+                    device.heartbeat()
+                    device.location = device.location
+            executor.submit(touch)
+        elif roll < 0.93:
+            executor.call("set_environment_parent", f"room{rng.randrange(ROOMS_PER_HOME)}",
+                          f"floor{rng.randrange(2)}")
+        elif roll < 0.96:
+            # Try to register a device that still belongs to one home in another. The source's
+            # writer thread holds the device meanwhile; always waiting on a higher-numbered
+            # executor keeps these cross-executor waits from deadlocking.
+            first, second = sorted(rng.sample(range(len(executors)), 2))
+            target = executors[second]
+            device_id = rng.choice(known_ids)
+
+            def steal(home, target=target, device_id=device_id):
+                device = home.get_device(device_id)
+                return device is not None and target.submit(lambda other: other.register_device(device)).result()
+            if executors[first].submit(steal).result():
+                stats["stolen"] += 1
+        else:
+            executor.call("check_device_health")
+
+
+def run(threads: int, homes: int, operations: int, seed: int, check_interval: float) -> dict:
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        executors = [SmartHomeExecutor(build_home()) for _ in range(homes)]
+    stats = {"created": 0, "removed": 0, "lost": 0, "stolen": 0}
+    thread_stats = [dict(stats) for _ in range(threads)]
+    errors: List[str] = []
+    done = threading.Event()
+
+    def checker():
+        # Check each home's invariants while the workers keep mutating the homes.
+        while not done.wait(check_interval):
+            for index, executor in enumerate(executors):
+                errors.extend(f"home{index}: {error}" for error in executor.submit(home_invariants).result())
+
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+        workers = [threading.Thread(target=worker, args=(executors, index, operations, seed + index, thread_stats[index]))
+                   for index in range(threads)]
+        check_thread = threading.Thread(target=checker)
+        start = time.perf_counter()
+        check_thread.start()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        check_thread.join()
+        for executor in executors:
+            executor.close()
+
+    for thread_stat in thread_stats:
+        for key, value in thread_stat.items():
+            stats[key] += value
+    if stats["stolen"]:
+        errors.append(f"{stats['stolen']} devices were registered while still in another home")
+
+    seen = set()
+    total = 0
+    for index, executor in enumerate(executors):
+        errors.extend(f"home{index}: {error}" for error in home_invariants(executor.home))
+        for device in executor.home._devices:
+            if device in seen:
+                errors.append(f"{device.device_id} is in more than one home")
+            seen.add(device)
+        total += len(executor.home._devices)
+    expected = stats["created"] - stats["removed"] - stats["lost"]
+    if total != expected:
+        errors.append(f"{total} devices in homes, expected {expected}")
+
+    return {"ops_per_second": threads * operations / elapsed, "errors": errors, "devices": total,
+            "lost": stats["lost"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress SmartHomeExecutor with randomized concurrent operations.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--homes", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=5000, help="Operations per thread.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'threads':>8} {'ops/s':>10} {'devices':>8} {'lost':>6} {'violations':>10}")
+    for threads in args.threads:
+        result = run(threads, args.homes, args.operations, args.seed, args.check_interval)
+        print(f"{threads:>8} {result['ops_per_second']:>10.0f} {result['devices']:>8} {result['lost']:>6} "
+              f"{len(result['errors']):>10}")
+        for error in result["errors"][:10]:
+            print(f"    {error}")
+        failed = failed or bool(result["errors"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from smartdevice import SmartDevice
+from devicetemplate import DeviceTemplate, TemplateField
 
 class VoiceAssistant(SmartDevice):
+    state_fields = ('volume', 'language', 'commands_received')
+    volume = TemplateField()
+    language = TemplateField()
+
     def __init__(self, device_id, volume=50, language="English", **kwargs):
         super().__init__(device_id, **kwargs)
-        self.volume:int = volume
-        self.language: str = language
+        self._template = DeviceTemplate.intern(VoiceAssistant, volume=volume, language=language)
         self.commands_received: list = []
 
     def listen(self) -> None:
@@ -17,6 +21,8 @@ class VoiceAssistant(SmartDevice):
                 break
             else:
                 self.commands_received.append(command)
+                if self._changelog is not None:
+                    self._changelog.record(("device", self._device_id))
                 print(f"Command '{command}' saved.")
 
     def get_details(self):
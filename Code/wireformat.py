@@ -0,0 +1,225 @@
+import struct
+import sys
+from array import array
+from itertools import compress, repeat
+from operator import attrgetter, is_, itemgetter
+from typing import Dict, Iterable, List, Tuple
+from devicetemplate import TemplateField
+from smartcamera import SmartCamera
+from smartdevice import SmartDevice
+from smartlight import SmartLight
+from smartthermostat import SmartThermostat
+from voiceassistant import VoiceAssistant
+
+WIRE_MAGIC = b"SHWF"
+WIRE_VERSION = 1
+
+# Field kinds: 'i' integer, 'b' bool (one byte), 's' interned string, 'S' list of interned strings.
+# The third item names the constructor argument that sets the field, or None if it's set afterwards.
+SCHEMAS = {
+    1: (SmartLight, (('brightness', 'i', 'brightness'), ('color', 's', 'color'))),
+    2: (SmartThermostat, (('current_temp', 'i', 'current_temp'), ('desired_temp', 'i', 'desired_temp'),
+                          ('mode', 's', 'mode'))),
+    3: (SmartCamera, (('view_angle', 'i', 'view_angle'), ('original_capacity', 'i', 'recording_capacity'),
+                      ('remaining_capacity', 'i', None), ('is_recording', 'b', None),
+                      ('motion_detection', 'b', 'motion_detection'))),
+    4: (VoiceAssistant, (('volume', 'i', 'volume'), ('language', 's', 'language'),
+                         ('commands_received', 'S', None))),
+}
+TAGS = {device_class: tag for tag, (device_class, _) in SCHEMAS.items()}
+KINDS = {device_class: {name: kind for name, kind, _ in fields} for device_class, fields in SCHEMAS.values()}
+
+_HEADER = struct.Struct("<4sBBHI")
+_COUNT = struct.Struct("<I")
+# Narrowest first; every column picks the first typecode that holds all of its values.
+_SIGNED = (('b', -2 ** 7, 2 ** 7 - 1), ('h', -2 ** 15, 2 ** 15 - 1), ('i', -2 ** 31, 2 ** 31 - 1))
+_UNSIGNED = (('B', 0, 2 ** 8 - 1), ('H', 0, 2 ** 16 - 1), ('I', 0, 2 ** 32 - 1))
+
+
+def encode_devices(devices: Iterable[SmartDevice]) -> bytes:
+    """
+    Encode a list of devices into one contiguous, versioned binary buffer.
+
+    Layout (little-endian):
+    - header: magic, format version, flags, reserved, device count
+    - one type tag byte per device, preserving the original order
+    - symbol table: every distinct status, location, color, mode, language and command
+    - one columnar section per device type, in SCHEMAS order: a count, the device
+      IDs as length-prefixed UTF-8, symbol references for status and location, then
+      one column per schema field
+
+    Integer columns and symbol references use the narrowest of 1, 2 or 4 bytes that
+    fits every value in the column, recorded as a typecode byte in front of it.
+
+    Raises:
+        ValueError: If a device type has no schema or a field doesn't fit its declared kind.
+    """
+    devices = list(devices)
+    types = list(map(type, devices))
+    unknown = set(types).difference(TAGS)
+    if unknown:
+        raise ValueError(f"No wire schema for {unknown.pop().__name__}.")
+    tags = bytes(map(TAGS.__getitem__, types))
+
+    symbols: Dict[str, int] = {}
+
+    def refs(values: List[str]) -> bytes:
+        if set(map(type, values)) - {str}:
+            raise ValueError("Interned fields must be strings.")
+        for value in set(values).difference(symbols):
+            symbols[value] = len(symbols)
+        return _pack_ints(list(map(symbols.__getitem__, values)), _UNSIGNED)
+
+    sections = []
+    for tag, (device_class, fields) in SCHEMAS.items():
+        group = list(compress(devices, map(is_, types, repeat(device_class))))
+        columns = [_COUNT.pack(len(group)), _pack_strings(list(map(attrgetter('_device_id'), group))),
+                   refs(list(map(attrgetter('_status'), group))), refs(list(map(attrgetter('_location'), group)))]
+        overrides = list(map(vars, group))
+        templates = list(map(attrgetter('_template.values'), group))
+        for name, kind, _ in fields:
+            if isinstance(getattr(device_class, name, None), TemplateField):
+                # Same as reading the attribute, without a descriptor call per device.
+                values = list(map(dict.get, overrides, repeat(name), map(itemgetter(name), templates)))
+            else:
+                values = list(map(attrgetter(name), group))
+            if kind == 'i':
+                if set(map(type, values)) - {int}:
+                    raise ValueError(f"'{name}' must be an integer for every device.")
+                columns.append(_pack_ints(values, _SIGNED))
+            elif kind == 'b':
+                if set(map(type, values)) - {bool}:
+                    raise ValueError(f"'{name}' must be a bool for every device.")
+                columns.append(bytes(values))
+            elif kind == 's':
+                columns.append(refs(values))
+            else:
+                columns.append(_pack_ints(list(map(len, values)), _UNSIGNED))
+                columns.append(refs([value for items in values for value in items]))
+        sections.append(b"".join(columns))
+
+    header = _HEADER.pack(WIRE_MAGIC, WIRE_VERSION, 0, 0, len(devices))
+    return b"".join([header, bytes(tags), _pack_strings(list(symbols)), *sections])
+
+
+def check_field(device_class: type, name: str, value) -> None:
+    """
+    Check that a field value can be written to the wire format.
+
+    Raises:
+        ValueError: If the value doesn't fit the field's kind in the device type's schema.
+    """
+    kind = KINDS.get(device_class, {}).get(name)
+    if kind == 'i':
+        low, high = _SIGNED[-1][1:]
+        if type(value) is not int or not low <= value <= high:
+            raise ValueError(f"'{name}' must be an integer between {low} and {high}.")
+    elif kind == 'b' and type(value) is not bool:
+        raise ValueError(f"'{name}' must be a bool.")
+    elif kind == 's' and type(value) is not str:
+        raise ValueError(f"'{name}' must be a string.")
+    elif kind == 'S' and (type(value) is not list or set(map(type, value)) - {str}):
+        raise ValueError(f"'{name}' must be a list of strings.")
+
+
+def decode_devices(buffer: bytes) -> List[SmartDevice]:
+    """
+    Decode a buffer produced by encode_devices back into device instances, in their original order.
+
+    Raises:
+        ValueError: If the buffer isn't in this wire format or uses an unsupported version.
+    """
+    view = memoryview(buffer)
+    magic, version, _, _, total = _HEADER.unpack_from(view, 0)
+    if magic != WIRE_MAGIC:
+        raise ValueError("Not a SmartHome wire buffer.")
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported wire format version {version}.")
+    offset = _HEADER.size
+    tags = view[offset:offset + total]
+    symbols, offset = _unpack_strings(view, offset + total)
+
+    by_tag: Dict[int, List[SmartDevice]] = {}
+    for tag, (device_class, fields) in SCHEMAS.items():
+        (count,) = _COUNT.unpack_from(view, offset)
+        ids, offset = _unpack_strings(view, offset + _COUNT.size)
+        statuses, offset = _unpack_ints(view, offset, count)
+        locations, offset = _unpack_ints(view, offset, count)
+        columns = []
+        for _, kind, _ in fields:
+            if kind == 'i':
+                column, offset = _unpack_ints(view, offset, count)
+            elif kind == 'b':
+                column, offset = list(map(bool, view[offset:offset + count])), offset + count
+            elif kind == 's':
+                column, offset = _unpack_ints(view, offset, count)
+                column = list(map(symbols.__getitem__, column))
+            else:
+                sizes, offset = _unpack_ints(view, offset, count)
+                flat, offset = _unpack_ints(view, offset, sum(sizes))
+                flat, start, column = list(map(symbols.__getitem__, flat)), 0, []
+                for size in sizes:
+                    column.append(flat[start:start + size])
+                    start += size
+            columns.append(column)
+
+        constructor_fields = [(argument, columns[index]) for index, (_, _, argument) in enumerate(fields) if argument]
+        late_fields = [(name, columns[index]) for index, (name, _, argument) in enumerate(fields) if not argument]
+        group = []
+        for row in range(count):
+            device = device_class(ids[row], status=symbols[statuses[row]], location=symbols[locations[row]],
+                                  **{argument: column[row] for argument, column in constructor_fields})
+            for name, column in late_fields:
+                setattr(device, name, column[row])
+            group.append(device)
+        by_tag[tag] = group
+
+    positions = {tag: iter(group) for tag, group in by_tag.items()}
+    return [next(positions[tag]) for tag in tags]
+
+
+def _pack_ints(values: List[int], widths: Tuple) -> bytes:
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for typecode, minimum, maximum in widths:
+        if minimum <= low and high <= maximum:
+            column = array(typecode, values)
+            if sys.byteorder == "big":
+                column.byteswap()
+            return typecode.encode() + column.tobytes()
+    raise ValueError(f"Integer column out of range: {low}..{high}.")
+
+
+def _unpack_ints(view: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    column = array(chr(view[offset]))
+    end = offset + 1 + count * column.itemsize
+    column.frombytes(view[offset + 1:end])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column, end
+
+
+def _pack_strings(values: List[str]) -> bytes:
+    joined = "".join(values).encode()
+    if len(joined) == sum(map(len, values)):
+        # All ASCII: character counts are byte counts.
+        lengths = list(map(len, values))
+    else:
+        encoded = [value.encode() for value in values]
+        joined, lengths = b"".join(encoded), list(map(len, encoded))
+    return _COUNT.pack(len(values)) + _pack_ints(lengths, _UNSIGNED) + joined
+
+
+def _unpack_strings(view: memoryview, offset: int) -> Tuple[List[str], int]:
+    (count,) = _COUNT.unpack_from(view, offset)
+    lengths, offset = _unpack_ints(view, offset + _COUNT.size, count)
+    end = offset + sum(lengths)
+    text = str(view[offset:end], "utf-8")
+    if len(text) == end - offset:
+        data, unit = text, 1
+    else:
+        data, unit = view[offset:end], 0
+    strings, start = [], 0
+    for length in lengths:
+        strings.append(data[start:start + length] if unit else str(data[start:start + length], "utf-8"))
+        start += length
+    return strings, end